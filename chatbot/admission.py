@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+
+# Per-client rate limit: sustained requests per minute and burst size
+# (RATE_LIMIT_PER_MIN=0 turns the limiter off, e.g. for replay load tests)
+RATE_LIMIT_PER_MIN = float(os.getenv('RATE_LIMIT_PER_MIN', 30))
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 10))
+
+# LLM budget. Keep LLM_MAX_IN_FLIGHT + LLM_MAX_QUEUE below the number of
+# server threads so cheap local answers always find a free worker.
+#
+# Both limits are per process. gunicorn runs WEB_CONCURRENCY workers (2 by
+# default), so the upstream sees up to LLM_MAX_IN_FLIGHT x WEB_CONCURRENCY
+# concurrent calls, and a client whose requests land on different workers
+# gets up to WEB_CONCURRENCY times RATE_LIMIT_PER_MIN. Size them accordingly.
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', 4))
+LLM_MAX_QUEUE = int(os.getenv('LLM_MAX_QUEUE', 2))
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', 2.0))
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `capacity`.
+    """
+
+    def __init__(self, rate, capacity, now=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def try_acquire(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def retry_after(self):
+        """Seconds until the next token is available (never, at rate 0)."""
+        if self.rate <= 0:
+            return float('inf')
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+class ClientRateLimiter:
+    """
+    One token bucket per client key, with idle buckets pruned once the table
+    grows past `max_clients`. A rate of zero or less disables the limiter.
+    """
+
+    def __init__(self, per_minute=RATE_LIMIT_PER_MIN, burst=RATE_LIMIT_BURST, max_clients=10000):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def enabled(self):
+        return self.rate > 0 and self.burst > 0
+
+    def allow(self, client):
+        """
+        Returns (allowed, retry_after_seconds).
+        """
+        if not self.enabled:
+            return True, 0.0
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                if len(self.buckets) >= self.max_clients:
+                    self._prune(now)
+                bucket = self.buckets[client] = TokenBucket(self.rate, self.burst, now)
+            if bucket.try_acquire(now):
+                return True, 0.0
+            self.rejected += 1
+            return False, bucket.retry_after()
+
+    def _prune(self, now):
+        # A bucket idle long enough to be full again carries no state worth keeping
+        full_after = self.burst / self.rate if self.rate > 0 else float('inf')
+        idle = [key for key, b in self.buckets.items() if now - b.updated >= full_after]
+        for key in idle:
+            del self.buckets[key]
+        if len(self.buckets) >= self.max_clients:
+            oldest = min(self.buckets, key=lambda key: self.buckets[key].updated)
+            del self.buckets[oldest]
+
+
+class LLMGate:
+    """
+    Caps concurrent LLM calls at `max_in_flight`, with a bounded wait queue.
+    Callers that can't get a slot (queue full or `timeout` elapsed) are turned
+    away immediately instead of piling up behind slow upstream calls.
+    """
+
+    def __init__(self, max_in_flight=LLM_MAX_IN_FLIGHT, max_queue=LLM_MAX_QUEUE, timeout=LLM_QUEUE_TIMEOUT):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            if self.in_flight < self.max_in_flight and self.waiting == 0:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+
+            self.waiting += 1
+            try:
+                ok = self.cond.wait_for(lambda: self.in_flight < self.max_in_flight, self.timeout)
+            finally:
+                self.waiting -= 1
+            if not ok:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+    def try_acquire(self):
+        """
+        Take a slot only if one is free right now (never queues).
+        """
+        with self.cond:
+            if self.in_flight < self.max_in_flight and self.waiting == 0:
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            return False
+
+    def release(self):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify()
+
+    def stats(self):
+        with self.cond:
+            return {
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'shed': self.shed,
+            }
@@ -1,13 +1,22 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+# Imported first so MEMORY_PROFILE=1 / --profile-memory can attribute the imports below
+from memory_profile import memory_profiler, format_report
+from flask import Flask, request, jsonify
 from flask_cors import CORS
-import google.generativeai as genai
+from werkzeug.middleware.proxy_fix import ProxyFix
+import hmac
 import os
+import sys
 from datetime import datetime, timedelta
-import json
-import torch
 import random
-from model import NeuralNet
-from nltk_utils import bag_of_words, tokenize
+from nltk_utils import tokenize, stem
+from static_assets import send_static_asset
+from admission import ClientRateLimiter, LLMGate
+from request_log import RequestLog, StageTimer, client_hash
+from speculative import SPECULATIVE_LLM, SPECULATIVE_PIPELINE, SpeculativePipeline, low_coverage
+from routing import CONFIDENCE_THRESHOLD, GEMINI_KEYWORDS
+from tenants import TenantRegistry
+from llm_backends import create_backend
+from sessions import create_session_store, is_session_token, new_session_token
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -20,41 +29,60 @@ except Exception:
     ZoneInfo = None  # Fallback handled at runtime
 
 app = Flask(__name__)
+# Reverse proxies in front of the app (Railway's edge is one; 0 when exposed
+# directly). Only the X-Forwarded-For entries they appended are trusted, so
+# request.remote_addr is the real client and not a header it can set itself.
+TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 1))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
 # Enable CORS for all routes to allow frontend access
 CORS(app, origins=["http://localhost:5173", "http://127.0.0.1:5173"])
 
-# Configure Gemini API
+# Configure the LLM backend (pooled Gemini client by default, LLM_BACKEND=stub for llm_stub.py)
 # You'll need to set your API key as an environment variable
 # export GOOGLE_API_KEY="your_api_key_here"
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+with memory_profiler.step('LLM client'):
+    llm_backend = create_backend()
 
-# Initialize the Gemini model
-gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+BROCHURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PCTE-BROCHURE-2023-1.pdf')
 
-# Load intents and trained model
-with open('intents.json', 'r') as f:
-    intents = json.load(f)
+# Per-tenant classifiers, intents, prompts and RAG indexes, loaded on demand.
+# The default tenant (data.pth/intents.json in this directory) is loaded now
+# and never evicted; TENANT_WARM lists other tenants to load at startup.
+tenant_registry = TenantRegistry()
+with memory_profiler.step('NeuralNet weights'):
+    tenant_registry.get()
+# Loads the nltk tokenizer data now rather than on the first request
+with memory_profiler.step('nltk data'):
+    tokenize('warm up')
+TENANT_WARM = [t.strip() for t in os.getenv('TENANT_WARM', '').split(',') if t.strip()]
+if TENANT_WARM:
+    tenant_registry.warm(TENANT_WARM)
 
-# Load the trained model
-device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-FILE = "data.pth"
+# Lower bar used when the LLM budget is exhausted and a local answer beats a 429
+SHED_CONFIDENCE_THRESHOLD = float(os.getenv('SHED_CONFIDENCE_THRESHOLD', 0.5))
 
-try:
-    data = torch.load(FILE, weights_only=True)
-except TypeError:
-    data = torch.load(FILE)
-
-input_size = data["input_size"]
-output_size = data["output_size"]
-hidden_size = data["hidden_size"]
-all_words = data["all_words"]
-tags = data["tags"]
-model_state = data["model_state"]
-
-# Initialize the neural network
-model = NeuralNet(input_size, hidden_size, output_size).to(device)
-model.load_state_dict(model_state)
-model.eval()
+# Admission control: per-client token buckets and a cap on LLM calls (both per process)
+rate_limiter = ClientRateLimiter()
+llm_gate = LLMGate()
+
+# Speculative retrieval (SPECULATIVE_PIPELINE) or full LLM calls (SPECULATIVE_LLM)
+# for messages the classifier will probably not answer
+speculative_pipeline = SpeculativePipeline() if SPECULATIVE_PIPELINE or SPECULATIVE_LLM else None
+
+# Structured request events for analytics and traffic replay (written off-thread)
+request_log = RequestLog.from_env()
+# Only for load-test targets: rate-limit replayed requests per recorded client
+# (X-Replay-Client, sent by replay_log.py) instead of per replay host
+TRUST_REPLAY_CLIENT = os.getenv('TRUST_REPLAY_CLIENT', '0') == '1'
+
+# Recent turns per chat so follow-up questions reach Gemini with their context
+session_store = create_session_store()
+
+# Enables /admin/memory, which must be called with it in X-Admin-Token
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+# Cap on ?top= for /admin/memory (each entry is a tracemalloc snapshot line)
+ADMIN_MEMORY_MAX_TOP = 50
 
 # Helper to get "now" in the desired timezone
 # Priority: request-provided tz -> TIMEZONE env -> Asia/Kolkata -> system local
@@ -98,40 +126,26 @@ def should_use_gemini(user_message):
     """
     Check if the query should be routed directly to Gemini AI
     """
-    gemini_keywords = [
-        'what is', 'explain', 'tell me about', 'how does', 'define',
-        'artificial intelligence', 'machine learning', 'quantum', 'physics',
-        'chemistry', 'biology', 'history', 'cooking', 'recipe', 'weather',
-        'news', 'sports', 'entertainment', 'technology', 'programming',
-        'philosophy', 'psychology', 'economics', 'politics', 'science',
-        'travel', 'health', 'fitness', 'music', 'movies', 'books'
-    ]
-    
     user_lower = user_message.lower()
-    return any(keyword in user_lower for keyword in gemini_keywords)
+    return any(keyword in user_lower for keyword in GEMINI_KEYWORDS)
 
-def get_local_response(user_message, tz_name=None):
+def classify_message(user_message, tenant=None):
     """
-    Get response from local trained model and intents
+    Run the tenant's intent classifier. Returns (tag, confidence), or (None, 0.0) on error
+    """
+    return (tenant or tenant_registry.get()).classify(user_message)
+
+def get_local_response(user_message, tz_name=None, confidence_threshold=CONFIDENCE_THRESHOLD, classification=None,
+                       tenant=None):
+    """
+    Get response from the tenant's trained model and intents.
+    Pass `classification` (from classify_message) to skip re-running the model.
     """
     try:
-        # Tokenize and process the input
-        tokens = tokenize(user_message)
-        X = bag_of_words(tokens, all_words)
-        X = X.reshape(1, X.shape[0])
-        X = torch.from_numpy(X).to(device)
-
-        with torch.no_grad():
-            output = model(X)
-            probs = torch.softmax(output, dim=1)[0]
-            top_prob, top_idx = torch.max(probs, dim=0)
-
-        tag = tags[top_idx.item()]
-        confidence = top_prob.item()
-
-        # Check confidence threshold - increased to 0.8 for better accuracy
-        confidence_threshold = 0.8
-        if confidence >= confidence_threshold:
+        tenant = tenant or tenant_registry.get()
+        tag, confidence = classification or classify_message(user_message, tenant)
+
+        if tag is not None and confidence >= confidence_threshold:
             # Handle dynamic responses for date/time/day
             now = get_now(tz_name)
             if tag == 'current_time':
@@ -144,36 +158,121 @@ def get_local_response(user_message, tz_name=None):
                 return f"Tomorrow is {(now + timedelta(days=1)).strftime('%A')}", confidence, "local"
 
             # Find matching intent
-            for intent in intents["intents"]:
-                if tag == intent["tag"]:
-                    return random.choice(intent['responses']), confidence, "local"
+            if tenant.responses.get(tag):
+                return random.choice(tenant.responses[tag]), confidence, "local"
         
         return None, confidence, "local"
     except Exception as e:
         return None, 0.0, "local"
 
-def get_gemini_response(user_message):
+def get_gemini_response(user_message, metrics=None, tenant=None, history='', chunks=None):
     """
-    Get response from Gemini API
+    Get response from Gemini API, with the tenant's prompt, RAG context and
+    the conversation history. Pass `chunks` when retrieval already ran.
+    Prompt size statistics are added to `metrics` when given.
     """
     try:
-        prompt = f"""You are a helpful college assistant chatbot for PCTE (Punjab College of Technical Education). 
-        Respond to the following question in a friendly and informative way. 
-        Keep your response concise and helpful. If you don't know something specific about the college, say so politely.
+        tenant = tenant or tenant_registry.get()
+        if chunks is None:
+            chunks = tenant.retrieve(user_message)
+        prompt, prompt_stats = tenant.prompt_builder.build(user_message, chunks, history)
+        if metrics is not None:
+            metrics.update(prompt_stats)
         
-        User question: {user_message}
-        
-        Response:"""
-        
-        response = gemini_model.generate_content(prompt)
-        return response.text.strip(), "gemini"
+        return llm_backend.generate(prompt).strip(), "gemini"
     except Exception as e:
         return "I'm sorry, I'm having trouble processing your request right now. Please try again later.", "gemini"
 
+def router_unsure(user_message, tenant=None):
+    """
+    Cheap pre-check before classification: messages whose words are mostly
+    outside the training vocabulary rarely clear the confidence threshold
+    """
+    vocabulary = (tenant or tenant_registry.get()).vocabulary
+    return low_coverage([stem(w) for w in tokenize(user_message) if w.isalnum()], vocabulary)
+
+def speculative_gemini_response(user_message, tenant=None, history=''):
+    """
+    Gemini call started before the local answer is known. Only runs if an
+    LLM slot is free right now; returns (response, source, metrics) or None.
+    """
+    if not llm_gate.try_acquire():
+        return None
+    try:
+        metrics = {}
+        final_response, response_source = get_gemini_response(user_message, metrics, tenant, history)
+        return final_response, response_source, metrics
+    finally:
+        llm_gate.release()
+
+def speculative_retrieval(user_message, tenant):
+    """
+    RAG lookup started before the local answer is known; None on failure so
+    the normal path retries it
+    """
+    try:
+        return tenant.retrieve(user_message)
+    except Exception:
+        return None
+
+def get_client_id():
+    """
+    Identify the caller for rate limiting. remote_addr already comes from the
+    last trusted X-Forwarded-For hop (see TRUSTED_PROXIES); earlier hops are
+    client-controlled and would let a caller pick a fresh bucket per request.
+    """
+    if TRUST_REPLAY_CLIENT:
+        replayed = request.headers.get('X-Replay-Client')
+        if replayed:
+            return f"replay:{replayed}"
+    return request.remote_addr or 'unknown'
+
+def get_gated_gemini_response(user_message, tz_name=None, classification=None, metrics=None, tenant=None,
+                              history='', chunks=None):
+    """
+    Call Gemini only if a slot in the LLM budget is free.
+    Returns (response, source), or (None, None) if the request was shed and
+    there is no local answer to fall back on.
+    """
+    if llm_gate.acquire():
+        try:
+            return get_gemini_response(user_message, metrics, tenant, history, chunks)
+        finally:
+            llm_gate.release()
+
+    # Shed: answer locally if the classifier has a reasonable guess
+    local_response, _, _ = get_local_response(user_message, tz_name, SHED_CONFIDENCE_THRESHOLD, classification, tenant)
+    if local_response:
+        return local_response, "local_fallback"
+    return None, None
+
+def log_request(user_message, timer, tenant_id=None, **fields):
+    """
+    Queue a structured event for this request and count it for the tenant;
+    never blocks the response
+    """
+    timings = timer.total()
+    if tenant_id is not None:
+        tenant_registry.record_request(tenant_id, fields.get('route'), timings['total'])
+    if request_log is not None:
+        request_log.record(user_message, backend='flask', tenant=tenant_id, client=client_hash(get_client_id()),
+                           timings=timings, **fields)
+
+def too_busy_response(retry_after, message):
+    response = jsonify({
+        'error': message,
+        'status': 'error'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
 @app.route('/chat', methods=['POST'])
-def chat():
+@app.route('/t/<tenant_id>/chat', methods=['POST'])
+def chat(tenant_id=None):
     """
-    API endpoint with hybrid approach: local intents first, then Gemini fallback
+    API endpoint with hybrid approach: local intents first, then Gemini fallback.
+    The tenant comes from the path or the X-Tenant header (default tenant otherwise).
     """
     try:
         # Get the input text from the request
@@ -192,7 +291,37 @@ def chat():
                 'error': 'Message cannot be empty',
                 'status': 'error'
             }), 400
+
+        timer = StageTimer()
+        tag = None
+        metrics = {}
+
+        # Throttle before resolving the tenant, so unthrottled callers can't
+        # force cold model loads through X-Tenant or /t/<id>/chat. The tenant
+        # isn't verified yet, so the rejection isn't counted against one.
+        allowed, retry_after = rate_limiter.allow(get_client_id())
+        if not allowed:
+            log_request(user_message, timer, route='rate_limited')
+            return too_busy_response(retry_after, 'Too many requests, please slow down')
+
+        tenant_id = tenant_id or request.headers.get('X-Tenant') or tenant_registry.default_tenant
+        try:
+            with timer.stage('tenant'):
+                tenant = tenant_registry.get(tenant_id)
+        except KeyError:
+            return jsonify({
+                'error': f'Unknown tenant: {tenant_id}',
+                'status': 'error'
+            }), 404
         
+        # Conversation memory, per tenant and chat. Chat ids are random tokens
+        # issued here and returned as chat_id; anything else starts a new chat
+        chat_id = data.get('chat_id') or request.headers.get('X-Chat-Id')
+        if not is_session_token(chat_id):
+            chat_id = new_session_token()
+        session_id = f"{tenant_id}:{chat_id}"
+        history = session_store.history(session_id)
+
         # Determine preferred timezone from client or environment
         tz_name = None
         if isinstance(data, dict):
@@ -204,21 +333,57 @@ def chat():
         
         # Step 1: Check if query should go directly to Gemini
         if should_use_gemini(user_message):
-            final_response, response_source = get_gemini_response(user_message)
+            with timer.stage('llm'):
+                final_response, response_source = get_gated_gemini_response(
+                    user_message, tz_name, metrics=metrics, tenant=tenant, history=history)
             confidence = 0.0  # No local confidence for Gemini responses
             source = "gemini"
         else:
-            # Step 2: Try local model first
-            local_response, confidence, source = get_local_response(user_message, tz_name)
+            # Step 2: Try local model first, speculatively starting Gemini (or just the
+            # RAG lookup) if it looks unlikely to answer
+            speculation = None
+            if speculative_pipeline is not None and router_unsure(user_message, tenant):
+                if SPECULATIVE_LLM:
+                    speculation = speculative_pipeline.start(speculative_gemini_response, user_message, tenant, history)
+                elif tenant.embeddings is not None:
+                    speculation = speculative_pipeline.start(speculative_retrieval, user_message, tenant)
+
+            with timer.stage('classify'):
+                classification = classify_message(user_message, tenant)
+            tag = classification[0]
+            local_response, confidence, source = get_local_response(user_message, tz_name, classification=classification, tenant=tenant)
             
-            if local_response and confidence >= 0.8:
+            if local_response and confidence >= CONFIDENCE_THRESHOLD:
                 # Use local response if confidence is high enough
                 final_response = local_response
                 response_source = "local_intents"
+                if speculation is not None:
+                    speculation.discard()
+                    metrics['speculative'] = 'discarded'
             else:
-                # Step 3: Fall back to Gemini API
-                final_response, response_source = get_gemini_response(user_message)
+                # Step 3: Fall back to Gemini API, within the LLM budget
+                with timer.stage('llm'):
+                    speculative_result = speculation.result() if speculation is not None else None
+                    if speculative_result is not None and SPECULATIVE_LLM:
+                        final_response, response_source, llm_metrics = speculative_result
+                        metrics.update(llm_metrics, speculative='used')
+                    else:
+                        # Speculative retrieval results (if any) skip the RAG lookup
+                        chunks = speculative_result
+                        if chunks is not None:
+                            metrics['speculative'] = 'used'
+                        final_response, response_source = get_gated_gemini_response(
+                            user_message, tz_name, classification, metrics, tenant, history, chunks)
                 source = "gemini"
+
+        if final_response is None:
+            log_request(user_message, timer, tenant_id, tag=tag, confidence=confidence, route='shed', timezone=tz_name)
+            return too_busy_response(llm_gate.timeout, 'The assistant is busy right now, please try again shortly')
+
+        session_store.append(session_id, user_message, final_response)
+
+        log_request(user_message, timer, tenant_id, tag=tag, confidence=confidence, route=response_source,
+                    cache_hit=False, timezone=tz_name, **metrics)
         
         # Return the response with metadata
         return jsonify({
@@ -226,6 +391,8 @@ def chat():
             'status': 'success',
             'timestamp': get_now(tz_name).isoformat(),
             'user_input': user_message,
+            'tenant': tenant_id,
+            'chat_id': chat_id,
             'response_source': response_source,
             'local_confidence': confidence if source == "local" else None,
             'hybrid_mode': True
@@ -245,16 +412,41 @@ def health_check():
     return jsonify({
         'status': 'healthy',
 'timestamp': get_now().isoformat(),
-        'service': 'Chatbot API with Gemini'
+        'service': 'Chatbot API with Gemini',
+        'llm_gate': llm_gate.stats(),
+        'llm': llm_backend.stats(),
+        'sessions': session_store.stats(),
+        'rate_limited': rate_limiter.rejected,
+        'request_log': request_log.stats() if request_log else None,
+        'prompt': tenant_registry.get().prompt_builder.stats(),
+        'tenants': tenant_registry.stats(),
+        'speculative': speculative_pipeline.stats() if speculative_pipeline else None
     })
 
+@app.route('/admin/memory', methods=['GET'])
+def memory_report():
+    """
+    Per-component memory footprint (import time and load steps are only
+    recorded when the server started with MEMORY_PROFILE=1).
+    Disabled unless ADMIN_TOKEN is set.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Not found', 'status': 'error'}), 404
+    token = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({'error': 'Forbidden', 'status': 'error'}), 403
+    top = min(max(request.args.get('top', 10, type=int), 0), ADMIN_MEMORY_MAX_TOP)
+    return jsonify(memory_profiler.report(top=top))
+
 @app.route('/PCTE-BROCHURE-2023-1.pdf', methods=['GET'])
 def serve_brochure():
     """
-    Serve the college brochure PDF file
+    Serve the college brochure PDF file.
+    Supports byte ranges so PDF viewers can fetch pages on demand, and
+    ETag/Last-Modified revalidation so clients don't re-download it.
     """
     try:
-        return send_file('PCTE-BROCHURE-2023-1.pdf', as_attachment=False)
+        return send_static_asset(BROCHURE_PATH, mimetype='application/pdf')
     except FileNotFoundError:
         return jsonify({'error': 'Brochure not found'}), 404
 
@@ -267,17 +459,23 @@ def home():
         'message': 'Chatbot API with Gemini Integration',
         'endpoints': {
             'POST /chat': 'Send a message and get AI response',
+            'POST /t/<tenant>/chat': 'Same, for another college/department (or send X-Tenant)',
             'GET /health': 'Check API health status',
+            'GET /admin/memory': 'Memory footprint per component (needs ADMIN_TOKEN, MEMORY_PROFILE=1)',
             'GET /PCTE-BROCHURE-2023-1.pdf': 'Download college brochure'
         },
         'usage': {
             'method': 'POST',
             'url': '/chat',
-            'body': {'message': 'Your question here'}
+            'body': {'message': 'Your question here', 'chat_id': 'optional, from a previous response; keeps conversation context'}
         }
     })
 
 if __name__ == '__main__':
+    if '--profile-memory' in sys.argv:
+        # Print the startup footprint before serving; /admin/memory has the live view
+        print(format_report(memory_profiler.report()))
+
     # Check if API key is set
     if not os.getenv('GOOGLE_API_KEY'):
         print("Warning: GOOGLE_API_KEY environment variable not set!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Load test for /chat admission control.
+
+Simulates a server with a fixed pool of worker threads receiving a mix of
+cheap local-intent requests and slow LLM-bound requests, with and without
+the LLMGate from admission.py. Local hits are expected to keep a flat p99
+under gating while LLM-bound traffic saturates and gets shed.
+
+    python bench_admission.py
+    python bench_admission.py --workers 8 --llm-latency 1.5 --duration 10
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from admission import LLMGate
+from bench_utils import percentile
+
+
+def run(args, llm_rate, gate):
+    """
+    Drive one scenario and return {kind: (latencies, shed_count)}.
+    """
+    results = {'local': [], 'llm': []}
+    shed = {'local': 0, 'llm': 0}
+    lock = threading.Lock()
+
+    def handle(kind, arrived):
+        outcome = 'ok'
+        if kind == 'local':
+            time.sleep(args.local_latency)
+        elif gate is None or gate.acquire():
+            try:
+                time.sleep(args.llm_latency)
+            finally:
+                if gate is not None:
+                    gate.release()
+        else:
+            outcome = 'shed'
+        elapsed = time.perf_counter() - arrived
+        with lock:
+            results[kind].append(elapsed)
+            if outcome == 'shed':
+                shed[kind] += 1
+
+    # Open-loop arrivals: interleave both streams at their own fixed rates
+    events = []
+    for kind, rate in (('local', args.local_rate), ('llm', llm_rate)):
+        if rate > 0:
+            events += [(i / rate, kind) for i in range(int(args.duration * rate))]
+    events.sort()
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        start = time.perf_counter()
+        for offset, kind in events:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(handle, kind, time.perf_counter())
+
+    return {kind: (results[kind], shed[kind]) for kind in results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=8, help='server threads')
+    parser.add_argument('--local-rate', type=float, default=20.0, help='local-intent requests per second')
+    parser.add_argument('--llm-rates', default='2,5,10,20', help='comma separated LLM-bound request rates')
+    parser.add_argument('--local-latency', type=float, default=0.002)
+    parser.add_argument('--llm-latency', type=float, default=0.8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--max-in-flight', type=int, default=4)
+    parser.add_argument('--max-queue', type=int, default=2)
+    parser.add_argument('--queue-timeout', type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, local {args.local_rate:g} req/s @ {args.local_latency * 1000:g}ms, "
+          f"LLM @ {args.llm_latency * 1000:g}ms, gate {args.max_in_flight} in flight + {args.max_queue} queued\n")
+    print(f"{'llm req/s':>9} {'mode':<8} {'local p50':>10} {'local p99':>10} "
+          f"{'llm p50':>9} {'llm p99':>9} {'llm shed':>9}")
+
+    for llm_rate in [float(r) for r in args.llm_rates.split(',')]:
+        for mode in ('ungated', 'gated'):
+            gate = None
+            if mode == 'gated':
+                gate = LLMGate(args.max_in_flight, args.max_queue, args.queue_timeout)
+            stats = run(args, llm_rate, gate)
+            local, _ = stats['local']
+            llm, llm_shed = stats['llm']
+            print(f"{llm_rate:>9g} {mode:<8} {percentile(local, 50) * 1000:>8.1f}ms "
+                  f"{percentile(local, 99) * 1000:>8.1f}ms {percentile(llm, 50) * 1000:>7.0f}ms "
+                  f"{percentile(llm, 99) * 1000:>7.0f}ms {llm_shed:>5d}/{len(llm):<4d}")
+
+
+if __name__ == '__main__':
+    main()
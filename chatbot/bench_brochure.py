@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for static asset serving.
+
+Starts a threaded server that serves a file through send_static_asset and
+opens many clients that read the response slowly, like phones on a weak
+connection. It reports how many server workers were busy, then
+repeats the run for range requests and for nginx offload (X-Accel-Redirect).
+
+    python bench_brochure.py --clients 50 --size-mb 16
+    python bench_brochure.py --file PCTE-BROCHURE-2023-1.pdf
+"""
+
+import argparse
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+import static_assets
+from static_assets import send_static_asset
+
+
+def build_app(path):
+    app = Flask(__name__)
+
+    @app.route('/asset')
+    def asset():
+        return send_static_asset(path, mimetype='application/pdf')
+
+    return app
+
+
+class InFlight:
+    """
+    WSGI middleware counting requests whose response is still being sent,
+    i.e. how many server workers are tied up at a given moment.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.count += 1
+        try:
+            body = self.app(environ, start_response)
+        except Exception:
+            self._done()
+            raise
+        return _Tracked(body, self._done)
+
+    def _done(self):
+        with self.lock:
+            self.count -= 1
+
+
+class _Tracked:
+    def __init__(self, body, on_close):
+        self.body = body
+        self.on_close = on_close
+
+    def __iter__(self):
+        return iter(self.body)
+
+    def close(self):
+        try:
+            if hasattr(self.body, 'close'):
+                self.body.close()
+        finally:
+            self.on_close()
+
+
+def slow_client(port, extra_headers, read_size, delay, results):
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    request_lines = ['GET /asset HTTP/1.1', 'Host: localhost', 'Connection: close'] + extra_headers
+    sock.sendall(('\r\n'.join(request_lines) + '\r\n\r\n').encode())
+
+    received = 0
+    status = None
+    while True:
+        chunk = sock.recv(read_size)
+        if not chunk:
+            break
+        if status is None:
+            status = chunk.split(b' ', 2)[1].decode()
+        received += len(chunk)
+        time.sleep(delay)
+    sock.close()
+    results.append((status, received))
+
+
+def run_scenario(name, tracker, port, clients, extra_headers, read_size, delay):
+    results = []
+    threads = [
+        threading.Thread(target=slow_client, args=(port, extra_headers, read_size, delay, results))
+        for _ in range(clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+
+    peak = 0
+    samples = []
+    while any(t.is_alive() for t in threads):
+        busy = tracker.count
+        peak = max(peak, busy)
+        samples.append(busy)
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+
+    statuses = sorted({status for status, _ in results})
+    total_bytes = sum(received for _, received in results)
+    avg = sum(samples) / max(1, len(samples))
+    print(f"{name:<22} status={','.join(s or '?' for s in statuses):<8} "
+          f"bytes={total_bytes / 1e6:8.1f}MB  peak_workers={peak:3d}  "
+          f"avg_workers={avg:6.1f}  wall={elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--file', help='file to serve (defaults to a generated one)')
+    parser.add_argument('--size-mb', type=float, default=8.0)
+    parser.add_argument('--clients', type=int, default=30)
+    parser.add_argument('--read-size', type=int, default=64 * 1024)
+    parser.add_argument('--delay', type=float, default=0.01, help='seconds between client reads')
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    tmp = None
+    path = args.file
+    if not path:
+        tmp = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        tmp.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+        tmp.close()
+        path = tmp.name
+
+    tracker = InFlight(build_app(path))
+    server = make_server('127.0.0.1', 0, tracker, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    etag = static_assets.file_etag(path)
+    print(f"Serving {os.path.getsize(path) / 1e6:.1f}MB to {args.clients} slow clients\n")
+    try:
+        run_scenario('full download', tracker, port, args.clients, [], args.read_size, args.delay)
+        run_scenario('first page (range)', tracker, port, args.clients, ['Range: bytes=0-262143'], args.read_size, args.delay)
+        run_scenario('revalidate (304)', tracker, port, args.clients, [f'If-None-Match: "{etag}"'], args.read_size, args.delay)
+
+        static_assets.ACCEL_REDIRECT_PREFIX = '/protected/'
+        run_scenario('nginx offload', tracker, port, args.clients, [], args.read_size, args.delay)
+    finally:
+        server.shutdown()
+        if tmp:
+            os.unlink(tmp.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+LLM client benchmark against the local stub: fresh connections vs the pooled backend.
+
+Starts llm_stub.py in-process (or uses --url) and sends --requests prompts
+at --concurrency, once with a new HTTP connection per call (what a plain
+requests.post does) and once through GeminiBackend's keep-alive pool, then
+through batch() and stream(). Reports latency, throughput, 429s from the
+upstream's capacity limit and the TCP connections each mode opened.
+
+    python bench_llm.py
+    python bench_llm.py --concurrency 32 --pool-size 8 --latency-ms 800 --max-concurrency 16
+
+A pool smaller than the offered concurrency queues callers instead of
+tripping the upstream's limit (fewer 429s at the cost of queueing delay).
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_utils import percentile
+from llm_backends import GeminiBackend, LLMError
+from llm_stub import StubConfig, start_stub
+
+
+def stub_stats(url):
+    return requests.get(f"{url}/stats", timeout=5).json()
+
+
+def delta(before, after, name):
+    # The /stats call that took `after` opened a connection of its own
+    return after[name] - before[name] - (1 if name == 'connections' else 0)
+
+
+def run(name, url, call, prompts, concurrency):
+    before = stub_stats(url)
+    latencies, failures = [], 0
+
+    def timed(prompt):
+        t0 = time.perf_counter()
+        try:
+            call(prompt)
+            return (time.perf_counter() - t0) * 1000, None
+        except (LLMError, requests.RequestException) as e:
+            return (time.perf_counter() - t0) * 1000, e
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, error in pool.map(timed, prompts):
+            if error is None:
+                latencies.append(elapsed)
+            else:
+                failures += 1
+    wall = time.perf_counter() - t0
+    after = stub_stats(url)
+    print(f"{name:<14} {percentile(latencies, 50):>8.1f}ms {percentile(latencies, 95):>8.1f}ms "
+          f"{len(latencies) / wall:>8.1f}/s {failures:>6} {delta(before, after, 'rejected'):>6} "
+          f"{delta(before, after, 'connections'):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='use a running stub instead of starting one')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--pool-size', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=150.0)
+    parser.add_argument('--tokens-per-second', type=float, default=2000.0)
+    parser.add_argument('--response-tokens', type=int, default=60)
+    parser.add_argument('--max-concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = start_stub(StubConfig(args.latency_ms, args.latency_ms * 0.1, args.tokens_per_second,
+                                       args.response_tokens, args.max_concurrency, seed=0))
+        url = server.url
+
+    prompts = [f"Question: What is the fee for course {i}?\nAnswer:" for i in range(args.requests)]
+    backend = GeminiBackend(api_key='stub', base_url=url, pool_size=args.pool_size)
+    endpoint = backend._url('generateContent')
+
+    def unpooled(prompt):
+        # A new connection per call, as with a bare requests.post
+        response = requests.post(endpoint, json=GeminiBackend._body(prompt), timeout=30,
+                                 headers={'Connection': 'close'})
+        response.raise_for_status()
+        return GeminiBackend._text(response.json())
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, pool size {args.pool_size}, "
+          f"stub {url}\n")
+    print(f"{'mode':<14} {'p50':>10} {'p95':>10} {'rate':>10} {'failed':>6} {'429s':>6} {'conns':>6}")
+    run('unpooled', url, unpooled, prompts, args.concurrency)
+    run('pooled', url, backend.generate, prompts, args.concurrency)
+
+    before = stub_stats(url)
+    t0 = time.perf_counter()
+    results = backend.batch(prompts, return_exceptions=True)
+    wall = time.perf_counter() - t0
+    after = stub_stats(url)
+    ok = sum(1 for r in results if not isinstance(r, Exception))
+    print(f"{'batch':<14} {'':>10} {'':>10} {ok / wall:>8.1f}/s {len(results) - ok:>6} "
+          f"{delta(before, after, 'rejected'):>6} {delta(before, after, 'connections'):>6}")
+
+    first_chunk, totals = [], []
+    for prompt in prompts[:20]:
+        t0 = time.perf_counter()
+        for i, _ in enumerate(backend.stream(prompt)):
+            if i == 0:
+                first_chunk.append((time.perf_counter() - t0) * 1000)
+        totals.append((time.perf_counter() - t0) * 1000)
+    print(f"\nstream: first chunk p50 {percentile(first_chunk, 50):.1f}ms, "
+          f"complete p50 {percentile(totals, 50):.1f}ms")
+    print(f"backend: {backend.stats()}")
+
+    backend.close()
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
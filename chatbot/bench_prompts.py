@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Offline prompt-size report: legacy prompt assembly vs PromptBuilder.
+
+Chunks the intents corpus the same way PDFProcessor chunks the brochure,
+retrieves candidates for every training pattern with a bag-of-words cosine
+score, and sends both prompt variants to a fake backend whose latency grows
+with prompt size. Prints average prompt tokens and answer latency.
+
+    python bench_prompts.py
+    python bench_prompts.py --budget 500 --floor 0.3 --per-token-ms 0.5
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import time
+from collections import Counter
+
+from prompt_builder import RAG_PROMPT, COLLEGE_PROMPT, PromptBuilder, estimate_tokens
+
+_WORD = re.compile(r"\w+")
+
+
+def legacy_prompt(message, chunks):
+    """
+    The prompt front-end/api/chat.py used to send: top-3 raw chunks with
+    score banners plus the long fixed preamble.
+    """
+    context_parts = []
+    for i, (chunk, score) in enumerate(chunks[:3], 1):
+        context_parts.append(f"--- Relevant Information {i} (Relevance: {score:.2f}) ---\n{chunk}")
+    context = "\n\n".join(context_parts)
+    return f"""You are a helpful college assistant chatbot for PCTE (Punjab College of Technical Education).
+        Use the context below to answer the user's question. If the context doesn't contain the answer,
+        use your general knowledge but indicate that the information might not be specific to PCTE.
+
+        Context:
+        {context}
+
+        User question: {message}
+
+        Response:"""
+
+
+class FakeBackend:
+    """
+    Stand-in LLM whose latency is base + per-token cost, scaled down by
+    `time_scale` so the report runs quickly.
+    """
+
+    def __init__(self, base_ms, per_token_ms, time_scale):
+        self.base_ms = base_ms
+        self.per_token_ms = per_token_ms
+        self.time_scale = time_scale
+
+    def generate(self, prompt):
+        time.sleep((self.base_ms + self.per_token_ms * estimate_tokens(prompt)) / 1000 * self.time_scale)
+        return "ok"
+
+
+def vectorize(text):
+    return Counter(_WORD.findall(text.lower()))
+
+
+def cosine(a, b):
+    dot = sum(count * b.get(word, 0) for word, count in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def build_corpus(intents, chunk_size=500):
+    text = "\n".join(response for intent in intents['intents'] for response in intent['responses'])
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--intents', default='intents.json')
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--candidates', type=int, default=5)
+    parser.add_argument('--budget', type=int, default=700)
+    parser.add_argument('--floor', type=float, default=0.25)
+    parser.add_argument('--base-ms', type=float, default=300.0)
+    parser.add_argument('--per-token-ms', type=float, default=0.4)
+    parser.add_argument('--time-scale', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.intents, 'r') as f:
+        intents = json.load(f)
+
+    chunks = build_corpus(intents)
+    chunk_vectors = [vectorize(chunk) for chunk in chunks]
+    patterns = [p for intent in intents['intents'] for p in intent['patterns']]
+    random.Random(args.seed).shuffle(patterns)
+    queries = patterns[:args.queries]
+
+    builder = PromptBuilder(RAG_PROMPT, token_budget=args.budget, relevance_floor=args.floor,
+                            no_context_template=COLLEGE_PROMPT)
+    backend = FakeBackend(args.base_ms, args.per_token_ms, args.time_scale)
+
+    rows = {'legacy': [], 'budgeted': []}
+    for query in queries:
+        q = vectorize(query)
+        scored = sorted(((chunk, cosine(q, vec)) for chunk, vec in zip(chunks, chunk_vectors)),
+                        key=lambda c: c[1], reverse=True)
+
+        t0 = time.perf_counter()
+        prompt = legacy_prompt(query, scored)
+        build_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        backend.generate(prompt)
+        rows['legacy'].append((estimate_tokens(prompt), build_ms, (time.perf_counter() - t0) * 1000))
+
+        t0 = time.perf_counter()
+        prompt, _ = builder.build(query, scored[:args.candidates])
+        build_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        backend.generate(prompt)
+        rows['budgeted'].append((estimate_tokens(prompt), build_ms, (time.perf_counter() - t0) * 1000))
+
+    print(f"{len(queries)} queries, {len(chunks)} chunks, budget {args.budget} tokens, floor {args.floor}")
+    print(f"fake backend: {args.base_ms:g}ms + {args.per_token_ms:g}ms/token\n")
+    print(f"{'variant':<10} {'avg tokens':>10} {'max tokens':>10} {'build':>8} {'answer latency':>15}")
+    for name, values in rows.items():
+        tokens = [v[0] for v in values]
+        build = sum(v[1] for v in values) / len(values)
+        latency = sum(v[2] for v in values) / len(values) / args.time_scale
+        print(f"{name:<10} {sum(tokens) / len(tokens):>10.1f} {max(tokens):>10d} "
+              f"{build:>6.3f}ms {latency:>13.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Session store throughput and memory at a large number of concurrent sessions.
+
+Fills the store with --sessions conversations (several turns each), then
+replays a request mix over them: read the rendered history, append a turn,
+as /chat does. Reports per-operation latency, memory per session, and LRU
+and TTL evictions when --max-sessions is below --sessions.
+
+    python bench_sessions.py --sessions 100000
+    python bench_sessions.py --sessions 100000 --sqlite /tmp/sessions.db --threads 4
+    python bench_sessions.py --sessions 100000 --max-sessions 50000 --ttl 5
+    python bench_sessions.py --sessions 10000 --answer-chars 100000   # long replies stay bounded
+"""
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_utils import percentile
+from sessions import MemorySessionStore, SQLiteSessionStore
+
+QUESTIONS = [
+    "What courses does PCTE offer?", "Tell me about the BCA program", "and what about its fees?",
+    "Is there hostel facility?", "How are the placements for MBA?", "Who is the principal?",
+    "Does the college have a library?", "What is the admission process?", "Are scholarships available?",
+]
+ANSWER = ("PCTE offers undergraduate and postgraduate programs in management, computer applications, "
+          "commerce and hotel management, with placement support and modern labs. ") * 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--turns', type=int, default=8, help='turns per session while filling')
+    parser.add_argument('--requests', type=int, default=50000)
+    parser.add_argument('--max-sessions', type=int, default=0, help='store capacity (default: --sessions)')
+    parser.add_argument('--ttl', type=float, default=3600.0)
+    parser.add_argument('--sqlite', help='benchmark the SQLite store at this path instead of memory')
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--answer-chars', type=int, default=len(ANSWER), help='length of each stored reply')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    answer = (ANSWER * (args.answer_chars // len(ANSWER) + 1))[:args.answer_chars]
+    max_sessions = args.max_sessions or args.sessions
+    tracemalloc.start()
+    if args.sqlite:
+        if os.path.exists(args.sqlite):
+            os.remove(args.sqlite)
+        store = SQLiteSessionStore(args.sqlite, max_sessions=max_sessions, ttl=args.ttl)
+    else:
+        store = MemorySessionStore(max_sessions=max_sessions, ttl=args.ttl)
+
+    # Fill: every session gets a full ring buffer and a summary
+    traced0 = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    for turn in range(args.turns):
+        for i in range(args.sessions):
+            # Distinct strings per turn, as real messages would be
+            store.append(f"pcte:chat-{i}", f"{QUESTIONS[(i + turn) % len(QUESTIONS)]} ({i})", f"{answer}({i})")
+    fill_seconds = time.perf_counter() - t0
+    traced = tracemalloc.get_traced_memory()[0] - traced0
+    tracemalloc.stop()  # keep tracing overhead out of the latencies below
+    appends = args.sessions * args.turns
+
+    # Request mix: history read then append, on random sessions
+    def request(_):
+        session_id = f"pcte:chat-{rng.randrange(args.sessions)}"
+        t0 = time.perf_counter()
+        history = store.history(session_id)
+        t1 = time.perf_counter()
+        store.append(session_id, f"{rng.choice(QUESTIONS)} ({session_id})", f"{answer}({session_id})")
+        t2 = time.perf_counter()
+        return (t1 - t0) * 1e6, (t2 - t1) * 1e6, len(history)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(request, range(args.requests)))
+    wall = time.perf_counter() - t0
+    reads = [r[0] for r in results]
+    writes = [r[1] for r in results]
+
+    stats = store.stats()
+    print(f"{args.sessions} sessions x {args.turns} turns, {stats['backend']} store, "
+          f"capacity {max_sessions}, {args.threads} thread(s)\n")
+    print(f"fill: {appends / fill_seconds:,.0f} appends/s")
+    if not args.sqlite:
+        print(f"memory: {traced / (1024 * 1024):.1f}MB traced, "
+              f"{traced / max(1, stats['sessions']):,.0f} bytes per session")
+    else:
+        print(f"database: {os.path.getsize(args.sqlite) / (1024 * 1024):.1f}MB on disk")
+    print(f"\n{'op':<8} {'p50':>9} {'p99':>9}")
+    print(f"{'history':<8} {percentile(reads, 50):>7.1f}us {percentile(reads, 99):>7.1f}us")
+    print(f"{'append':<8} {percentile(writes, 50):>7.1f}us {percentile(writes, 99):>7.1f}us")
+    print(f"\n{args.requests / wall:,.0f} requests/s; avg history {sum(r[2] for r in results) / len(results):.0f} chars")
+    print(f"store: {stats}")
+
+
+if __name__ == '__main__':
+    main()
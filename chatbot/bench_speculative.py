@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency of the sequential vs speculative pipeline on a replayed workload.
+
+Each request from a captured request log (see request_log.py) is re-executed
+with its recorded stage timings (classify, retrieval, llm) as sleeps: once
+sequentially, and once with the slow path started speculatively on a
+SpeculativePipeline whenever the router would be unsure. Requests that were
+answered locally discard their speculative work, which shows up in the
+wasted-work counters.
+
+    python bench_speculative.py logs/requests.*.jsonl
+    python bench_speculative.py --synthetic 300 --local-fraction 0.6 --speculate-llm
+"""
+
+import argparse
+import json
+import random
+import time
+
+from bench_utils import percentile
+from speculative import SpeculativePipeline
+
+LOCAL_ROUTES = ('local_intents', 'local_fallback')
+
+
+def load_workload(paths):
+    """
+    Turn logged events into (is_local, confidence, classify_ms, retrieval_ms, llm_ms).
+    """
+    workload = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                timings = event.get('timings') or {}
+                if event.get('route') in ('rate_limited', 'shed'):
+                    continue
+                workload.append((
+                    event.get('route') in LOCAL_ROUTES,
+                    event.get('confidence'),
+                    timings.get('classify', 1.0),
+                    timings.get('retrieval', 0.0),
+                    timings.get('llm', 0.0),
+                ))
+    return workload
+
+
+def synthetic_workload(n, local_fraction, seed):
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(n):
+        is_local = rng.random() < local_fraction
+        confidence = rng.uniform(0.8, 1.0) if is_local else rng.uniform(0.2, 0.85)
+        workload.append((is_local, confidence, rng.uniform(2, 15), rng.uniform(30, 120),
+                         0.0 if is_local else rng.uniform(600, 2500)))
+    return workload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('logs', nargs='*', help='captured request logs')
+    parser.add_argument('--synthetic', type=int, default=0, help='generate N synthetic requests instead')
+    parser.add_argument('--local-fraction', type=float, default=0.6)
+    parser.add_argument('--unsure-below', type=float, default=0.95,
+                        help='treat requests whose logged confidence is below this as router-unsure')
+    parser.add_argument('--speculate-llm', action='store_true', help='speculate the LLM call, not only retrieval')
+    parser.add_argument('--llm-ms', type=float, default=1200.0, help='LLM time for local hits when speculating')
+    parser.add_argument('--time-scale', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.logs:
+        workload = load_workload(args.logs)
+    else:
+        workload = synthetic_workload(args.synthetic or 200, args.local_fraction, args.seed)
+    if not workload:
+        print("Empty workload")
+        return
+
+    scale = args.time_scale / 1000.0
+
+    def sleep_ms(ms):
+        time.sleep(ms * scale)
+
+    def slow_path(retrieval_ms, llm_ms):
+        sleep_ms(retrieval_ms)
+        if args.speculate_llm:
+            sleep_ms(llm_ms)
+
+    sequential, speculative = [], []
+    pipeline = SpeculativePipeline(max_workers=4)
+
+    for is_local, confidence, classify_ms, retrieval_ms, llm_ms in workload:
+        # Sequential: classify, then (only if needed) retrieval and the LLM
+        t0 = time.perf_counter()
+        sleep_ms(classify_ms)
+        if not is_local:
+            sleep_ms(retrieval_ms + llm_ms)
+        sequential.append((time.perf_counter() - t0) / scale)
+
+        # Speculative: start the slow path alongside classification if unsure
+        t0 = time.perf_counter()
+        unsure = confidence is None or confidence < args.unsure_below
+        speculation = None
+        if unsure:
+            speculation = pipeline.start(slow_path, retrieval_ms, llm_ms or args.llm_ms)
+        sleep_ms(classify_ms)
+        if is_local:
+            if speculation is not None:
+                speculation.discard()
+        else:
+            if speculation is not None:
+                speculation.result()
+                if not args.speculate_llm:
+                    sleep_ms(llm_ms)
+            else:
+                sleep_ms(retrieval_ms + llm_ms)
+        speculative.append((time.perf_counter() - t0) / scale)
+
+    pipeline.pool.shutdown(wait=True)
+    stats = pipeline.stats()
+    local_count = sum(1 for w in workload if w[0])
+
+    print(f"{len(workload)} requests ({local_count} local), speculating "
+          f"{'retrieval + LLM' if args.speculate_llm else 'retrieval'}\n")
+    print(f"{'mode':<12} {'p50':>9} {'p95':>9} {'p99':>9} {'mean':>9}")
+    for name, values in (('sequential', sequential), ('speculative', speculative)):
+        print(f"{name:<12} {percentile(values, 50):>7.1f}ms {percentile(values, 95):>7.1f}ms "
+              f"{percentile(values, 99):>7.1f}ms {sum(values) / len(values):>7.1f}ms")
+    print(f"\nspeculative work: launched={stats['launched']} used={stats['used']} "
+          f"discarded={stats['discarded']} cancelled={stats['cancelled']} "
+          f"wasted={stats['wasted_ms'] / args.time_scale:.0f}ms of {(stats['used_ms'] + stats['wasted_ms']) / args.time_scale:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Memory per tenant and cold vs warm latency for the TenantRegistry.
+
+Creates N synthetic tenants in a temporary directory (a classifier with the
+default tenant's vocabulary, its intents and optionally a random RAG index),
+then measures:
+- RSS growth per loaded tenant, next to the registry's own size estimate
+- first request (cold: load + classify) vs later requests (warm: classify)
+- time to warm all tenants sequentially vs concurrently
+- evictions when the memory budget holds fewer tenants than are in use
+
+    python bench_tenants.py --tenants 20
+    python bench_tenants.py --tenants 20 --rag-chunks 2000 --budget-mb 40
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+from bench_utils import percentile
+from model import NeuralNet
+from tenants import BASE_DIR, TenantRegistry
+
+
+def rss_mb():
+    # Resident set size from /proc (Linux); falls back to peak RSS elsewhere
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_tenants(root, count, hidden_size, rag_chunks, embedding_dim, seed):
+    """
+    Write `count` tenant directories that look like real ones
+    """
+    try:
+        data = torch.load(os.path.join(BASE_DIR, 'data.pth'), weights_only=True)
+    except TypeError:
+        data = torch.load(os.path.join(BASE_DIR, 'data.pth'))
+    rng = np.random.default_rng(seed)
+
+    for i in range(count):
+        directory = os.path.join(root, f'tenant-{i:03d}')
+        os.makedirs(directory)
+        model = NeuralNet(data['input_size'], hidden_size, data['output_size'])
+        torch.save({
+            'model_state': model.state_dict(),
+            'input_size': data['input_size'],
+            'hidden_size': hidden_size,
+            'output_size': data['output_size'],
+            'all_words': data['all_words'],
+            'tags': data['tags'],
+        }, os.path.join(directory, 'data.pth'))
+        shutil.copy(os.path.join(BASE_DIR, 'intents.json'), directory)
+
+        if rag_chunks:
+            index_dir = os.path.join(directory, 'rag_index')
+            os.makedirs(index_dir)
+            np.save(os.path.join(index_dir, 'embeddings.npy'),
+                    rng.standard_normal((rag_chunks, embedding_dim), dtype=np.float32))
+            with open(os.path.join(index_dir, 'index.json'), 'w') as f:
+                json.dump({'chunks': [{'text': f'Tenant {i} brochure section {j}. ' * 20, 'source': 'synthetic'}
+                                      for j in range(rag_chunks)]}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tenants', type=int, default=10)
+    parser.add_argument('--hidden-size', type=int, default=8)
+    parser.add_argument('--rag-chunks', type=int, default=0, help='synthetic RAG index size per tenant')
+    parser.add_argument('--embedding-dim', type=int, default=384)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--budget-mb', type=float, default=0.0,
+                        help='memory budget for the eviction run (default: half the tenants fit)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(os.path.join(BASE_DIR, 'intents.json')) as f:
+        patterns = [p for intent in json.load(f)['intents'] for p in intent['patterns']]
+    rng = random.Random(args.seed)
+
+    root = tempfile.mkdtemp(prefix='bench-tenants-')
+    try:
+        make_tenants(root, args.tenants, args.hidden_size, args.rag_chunks, args.embedding_dim, args.seed)
+        tenant_ids = sorted(os.listdir(root))
+
+        # 1. Memory: load tenants one at a time with an unlimited budget
+        registry = TenantRegistry(tenants_dir=root, memory_budget_mb=1e9)
+        registry.get()
+        cold, warm, deltas = [], [], []
+        for tenant_id in tenant_ids:
+            before = rss_mb()
+            t0 = time.perf_counter()
+            registry.get(tenant_id).classify(rng.choice(patterns))
+            cold.append((time.perf_counter() - t0) * 1000)
+            deltas.append(rss_mb() - before)
+        for _ in range(args.requests):
+            tenant_id = rng.choice(tenant_ids)
+            t0 = time.perf_counter()
+            registry.get(tenant_id).classify(rng.choice(patterns))
+            warm.append((time.perf_counter() - t0) * 1000)
+
+        estimate_mb = registry.stats()['loaded_mb']
+        avg_estimate = sum(estimate_mb[t] for t in tenant_ids) / len(tenant_ids)
+        print(f"{args.tenants} tenants (hidden={args.hidden_size}, rag_chunks={args.rag_chunks})\n")
+        print(f"memory per tenant: RSS +{sum(deltas) / len(deltas):.2f}MB avg "
+              f"(max +{max(deltas):.2f}MB), registry estimate {avg_estimate:.2f}MB")
+        print(f"{'':<6} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for name, values in (('cold', cold), ('warm', warm)):
+            print(f"{name:<6} {percentile(values, 50):>7.2f}ms {percentile(values, 95):>7.2f}ms "
+                  f"{percentile(values, 99):>7.2f}ms")
+
+        # 2. Warming: sequential vs concurrent
+        sequential = TenantRegistry(tenants_dir=root, memory_budget_mb=1e9)
+        t0 = time.perf_counter()
+        for tenant_id in tenant_ids:
+            sequential.get(tenant_id)
+        sequential_ms = (time.perf_counter() - t0) * 1000
+        concurrent = TenantRegistry(tenants_dir=root, memory_budget_mb=1e9)
+        t0 = time.perf_counter()
+        errors = {t: e for t, e in concurrent.warm(tenant_ids, max_workers=args.workers).items() if e}
+        concurrent_ms = (time.perf_counter() - t0) * 1000
+        print(f"\nwarm {len(tenant_ids)} tenants: sequential {sequential_ms:.0f}ms, "
+              f"{args.workers} workers {concurrent_ms:.0f}ms" + (f" ({len(errors)} errors)" if errors else ''))
+
+        # 3. Eviction: uniform traffic over more tenants than the budget holds
+        budget = args.budget_mb or avg_estimate * max(1, args.tenants // 2) + estimate_mb[registry.default_tenant]
+        bounded = TenantRegistry(tenants_dir=root, memory_budget_mb=budget)
+        bounded.get()
+        latencies = []
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            bounded.get(rng.choice(tenant_ids)).classify(rng.choice(patterns))
+            latencies.append((time.perf_counter() - t0) * 1000)
+        stats = bounded.stats()
+        evictions = sum(m['evictions'] for m in stats['tenants'].values())
+        print(f"\nbudget {budget:.2f}MB: {len(stats['loaded_mb'])} tenants resident ({stats['used_mb']:.2f}MB), "
+              f"hit rate {stats['hits'] / max(1, stats['hits'] + stats['misses']):.1%}, {evictions} evictions, "
+              f"p50 {percentile(latencies, 50):.2f}ms p99 {percentile(latencies, 99):.2f}ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
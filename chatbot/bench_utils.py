@@ -0,0 +1,10 @@
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of `values` (0.0 when empty), shared by the
+    benchmark and replay scripts
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Export the trained intent classifier so the React app can run it in the browser.
+
+Loads the default tenant (data.pth and intents.json) the way the server does
+and writes:
+- front-end/public/intent-model.json: weights (base64 float32), vocabulary,
+  tags, responses, routing rules, the calibrated confidence threshold and a
+  token -> stem lexicon for every word seen in training
+- front-end/scripts/intent-parity.json: the server's prediction (tag and
+  confidence from Tenant.classify, as used by api_server.classify_message)
+  for every training pattern, checked by
+  `npm run check:intents` in front-end/
+
+Both files are generated, not committed; vercel-build.mjs runs this before
+the frontend build so every deploy ships a model that matches data.pth.
+
+    python export_model.py
+    python export_model.py --target-precision 0.995
+"""
+
+import argparse
+import base64
+import json
+import os
+
+import torch
+
+from nltk_utils import stem, tokenize
+from routing import CONFIDENCE_THRESHOLD, DYNAMIC_TAGS, GEMINI_KEYWORDS
+from tenants import BASE_DIR, DEFAULT_TENANT, Tenant
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'front-end')
+
+
+def encode_tensor(tensor):
+    array = tensor.detach().cpu().numpy().astype('<f4')
+    return {'shape': list(array.shape), 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def calibrate_threshold(predictions, target_precision):
+    """
+    Smallest threshold >= CONFIDENCE_THRESHOLD at which the predictions the
+    browser would answer locally reach `target_precision` on the patterns.
+    """
+    candidates = sorted({conf for _, _, conf in predictions if conf >= CONFIDENCE_THRESHOLD})
+    for threshold in [CONFIDENCE_THRESHOLD] + candidates:
+        accepted = [(expected, tag) for expected, tag, conf in predictions if conf >= threshold]
+        if not accepted:
+            break
+        precision = sum(1 for expected, tag in accepted if expected == tag) / len(accepted)
+        if precision >= target_precision:
+            return threshold
+    return 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tenant-dir', default=BASE_DIR, help='directory with data.pth and intents.json')
+    parser.add_argument('--out', default=os.path.join(FRONTEND_DIR, 'public', 'intent-model.json'))
+    parser.add_argument('--parity-out', default=os.path.join(FRONTEND_DIR, 'scripts', 'intent-parity.json'))
+    parser.add_argument('--target-precision', type=float, default=0.99)
+    args = parser.parse_args()
+
+    # The browser tokenizer mirrors nltk.word_tokenize; exporting with the
+    # whitespace fallback would ship a lexicon and fixtures it can't match
+    if tokenize('fee?') != ['fee', '?']:
+        parser.error('nltk punkt data is missing: python -m nltk.downloader punkt punkt_tab')
+
+    tenant = Tenant(DEFAULT_TENANT, args.tenant_dir, torch.device('cpu'))
+
+    # Predictions come from the server's own classification path, so the
+    # parity check follows any change to Tenant.classify
+    lexicon = {}
+    predictions = []
+    parity = []
+    for intent in tenant.intents['intents']:
+        for pattern in intent['patterns']:
+            tokens = tokenize(pattern)
+            for token in tokens:
+                lexicon[token.lower()] = stem(token)
+            tag, confidence = tenant.classify(pattern)
+            predictions.append((intent['tag'], tag, confidence))
+            parity.append({'text': pattern, 'tokens': tokens, 'tag': tag, 'confidence': confidence})
+
+    threshold = calibrate_threshold(predictions, args.target_precision)
+    state = tenant.model.state_dict()
+
+    artifact = {
+        'version': 1,
+        'input_size': tenant.model.l1.in_features,
+        'hidden_size': tenant.model.l1.out_features,
+        'output_size': tenant.model.l3.out_features,
+        'all_words': tenant.all_words,
+        'tags': tenant.tags,
+        'threshold': threshold,
+        'dynamic_tags': DYNAMIC_TAGS,
+        'gemini_keywords': GEMINI_KEYWORDS,
+        'lexicon': lexicon,
+        'responses': tenant.responses,
+        'layers': [encode_tensor(state[f'{name}.{part}']) for name in ('l1', 'l2', 'l3') for part in ('weight', 'bias')],
+    }
+
+    for path in (args.out, args.parity_out):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(artifact, f, separators=(',', ':'))
+    with open(args.parity_out, 'w') as f:
+        json.dump({'threshold': threshold, 'patterns': parity}, f, indent=1)
+
+    local = sum(1 for _, _, conf in predictions if conf >= threshold)
+    correct = sum(1 for expected, tag, _ in predictions if expected == tag)
+    print(f"Wrote {args.out} ({os.path.getsize(args.out) / 1024:.1f} KB)")
+    print(f"Threshold {threshold:.3f}: {local}/{len(predictions)} training patterns answered locally, "
+          f"training accuracy {correct / len(predictions):.3f}")
+
+
+if __name__ == '__main__':
+    main()
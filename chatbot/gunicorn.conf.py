@@ -0,0 +1,21 @@
+# Gunicorn settings for production deployments
+# Usage: gunicorn -c gunicorn.conf.py api_server:app
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
+
+# Threaded workers: a slow client only ties up one thread, not a whole process
+worker_class = 'gthread'
+# One process by default: each worker loads torch and the model, and the
+# admission limits (admission.py) are per process. With more than one,
+# sessions.py keeps chat sessions in a shared SQLite file instead of memory.
+# The gthread threads below already keep slow clients from blocking others.
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+# Static files returned through wsgi.file_wrapper are sent with os.sendfile()
+sendfile = True
+
+timeout = 120
+keepalive = 5
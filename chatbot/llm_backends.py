@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Which LLM to call: "gemini" (the real API) or "stub" (llm_stub.py, for offline load tests)
+LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL', 'https://generativelanguage.googleapis.com')
+LLM_STUB_URL = os.getenv('LLM_STUB_URL', 'http://127.0.0.1:8808')
+# Keep-alive connections to the LLM host; also caps concurrent upstream requests per process
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', 10))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 30))
+
+
+class LLMError(Exception):
+    """
+    The LLM call failed (transport error or non-2xx response).
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class LLMBackend:
+    """
+    Interface for text generation backends.
+
+    Subclasses implement generate(); stream() and batch() have generic
+    fallbacks (one chunk, and a thread pool over generate()).
+    """
+
+    name = 'base'
+
+    def __init__(self, batch_workers=LLM_POOL_SIZE):
+        self.batch_workers = batch_workers
+        self._batch_pool = None
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'errors': 0, 'streams': 0}
+        self.total_ms = 0.0
+
+    def generate(self, prompt):
+        """
+        Return the full response text for `prompt`. Raises LLMError.
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt):
+        """
+        Yield the response text in chunks as it is produced.
+        """
+        yield self.generate(prompt)
+
+    def batch(self, prompts, return_exceptions=False):
+        """
+        Generate several prompts concurrently, results in input order.
+        With return_exceptions, failed prompts yield their LLMError
+        instead of raising the first one.
+        """
+        with self.lock:
+            if self._batch_pool is None:
+                self._batch_pool = ThreadPoolExecutor(max_workers=self.batch_workers,
+                                                      thread_name_prefix=f'{self.name}-batch')
+        futures = [self._batch_pool.submit(self.generate, prompt) for prompt in prompts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except LLMError as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def _record(self, elapsed_ms, error=False, stream=False):
+        with self.lock:
+            self.counters['requests'] += 1
+            self.counters['errors'] += int(error)
+            self.counters['streams'] += int(stream)
+            self.total_ms += elapsed_ms
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['backend'] = self.name
+            stats['avg_ms'] = round(self.total_ms / stats['requests'], 1) if stats['requests'] else 0.0
+            return stats
+
+    def close(self):
+        if self._batch_pool is not None:
+            self._batch_pool.shutdown(wait=False)
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Gemini REST API over a pooled keep-alive session.
+
+    At most `pool_size` connections are opened to the host and reused across
+    requests; callers beyond that wait for a free connection. Point
+    `base_url` at llm_stub.py to run against a local stand-in.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, model=GEMINI_MODEL, api_key=None, base_url=GEMINI_BASE_URL,
+                 pool_size=LLM_POOL_SIZE, timeout=LLM_TIMEOUT):
+        super().__init__(batch_workers=pool_size)
+        self.model = model
+        self.api_key = api_key if api_key is not None else os.getenv('GOOGLE_API_KEY', '')
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json', 'x-goog-api-key': self.api_key})
+
+    def _url(self, method):
+        return f"{self.base_url}/v1beta/models/{self.model}:{method}"
+
+    @staticmethod
+    def _body(prompt):
+        return {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+
+    @staticmethod
+    def _text(payload):
+        try:
+            parts = payload['candidates'][0]['content']['parts']
+        except (KeyError, IndexError, TypeError):
+            return ''
+        return ''.join(part.get('text', '') for part in parts)
+
+    def _post(self, method, prompt, **kwargs):
+        try:
+            response = self.session.post(self._url(method), json=self._body(prompt), timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise LLMError(str(e)) from e
+        if response.status_code >= 400:
+            message = response.text[:200]
+            response.close()
+            raise LLMError(f"{self.name} returned {response.status_code}: {message}", response.status_code)
+        return response
+
+    def generate(self, prompt):
+        t0 = time.perf_counter()
+        try:
+            text = self._text(self._post('generateContent', prompt).json())
+        except (LLMError, ValueError) as e:
+            self._record((time.perf_counter() - t0) * 1000, error=True)
+            raise e if isinstance(e, LLMError) else LLMError(f"Malformed response: {e}")
+        self._record((time.perf_counter() - t0) * 1000)
+        return text
+
+    def stream(self, prompt):
+        t0 = time.perf_counter()
+        error = False
+        try:
+            with self._post('streamGenerateContent', prompt, params={'alt': 'sse'}, stream=True) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith('data:'):
+                        text = self._text(json.loads(line[5:]))
+                        if text:
+                            yield text
+        except (LLMError, ValueError, requests.RequestException) as e:
+            error = True
+            raise e if isinstance(e, LLMError) else LLMError(str(e))
+        finally:
+            self._record((time.perf_counter() - t0) * 1000, error=error, stream=True)
+
+    def stats(self):
+        stats = super().stats()
+        stats['pool_size'] = self.pool_size
+        return stats
+
+    def close(self):
+        super().close()
+        self.session.close()
+
+
+def create_backend(kind=None, **kwargs):
+    """
+    Backend named by `kind` (default: LLM_BACKEND).
+    """
+    kind = kind or LLM_BACKEND
+    if kind == 'gemini':
+        return GeminiBackend(**kwargs)
+    if kind == 'stub':
+        kwargs.setdefault('base_url', LLM_STUB_URL)
+        kwargs.setdefault('api_key', 'stub')
+        backend = GeminiBackend(**kwargs)
+        backend.name = 'stub'
+        return backend
+    raise ValueError(f"Unknown LLM backend: {kind}")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Local Gemini-style LLM server for offline benchmarks and load tests.
+
+Speaks the REST endpoints GeminiBackend uses (generateContent and
+streamGenerateContent?alt=sse) and behaves like a slow upstream: a time to
+first token, a fixed token throughput per response, limited capacity
+(excess requests get 429 like a quota error) and optional random failures.
+
+    python llm_stub.py --latency-ms 600 --tokens-per-second 80 --max-concurrency 16
+    LLM_BACKEND=stub gunicorn -c gunicorn.conf.py api_server:app
+
+GET /stats reports requests, rejections, peak concurrency and the number of
+TCP connections opened (to check clients reuse connections).
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FILLER = ('the college offers programs with experienced faculty modern labs and placement support '
+          'for students across management computer applications commerce and hotel management').split()
+
+
+class StubConfig:
+    def __init__(self, latency_ms=500.0, jitter_ms=100.0, tokens_per_second=60.0, response_tokens=80,
+                 max_concurrency=32, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.max_concurrency = max_concurrency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+
+
+class StubStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'streams': 0, 'rejected': 0, 'errors': 0, 'connections': 0}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def enter(self, limit):
+        with self.lock:
+            if self.in_flight >= limit:
+                self.counters['rejected'] += 1
+                return False
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counters, in_flight=self.in_flight, peak_in_flight=self.peak_in_flight)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so client pooling is visible
+    # Headers and body go out as separate writes; with Nagle on, each reply on a
+    # kept-alive connection would wait ~40ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stats.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            return self._json(200, self.server.stats.snapshot())
+        self._json(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+            prompt = ' '.join(part.get('text', '') for content in body.get('contents', [])
+                              for part in content.get('parts', []))
+        except (ValueError, AttributeError):
+            return self._json(400, {'error': {'code': 400, 'message': 'Invalid JSON payload'}})
+
+        path = self.path.split('?')[0]
+        if path.endswith(':generateContent'):
+            streaming = False
+        elif path.endswith(':streamGenerateContent'):
+            streaming = True
+        else:
+            return self._json(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+        config, stats = self.server.config, self.server.stats
+        if not stats.enter(config.max_concurrency):
+            return self._json(429, {'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED',
+                                              'message': 'Stub capacity exceeded'}})
+        try:
+            stats.count('streams' if streaming else 'requests')
+            with self.server.rng_lock:
+                latency = max(0.0, config.latency_ms + config.rng.uniform(-config.jitter_ms, config.jitter_ms))
+                fail = config.rng.random() < config.error_rate
+            time.sleep(latency / 1000.0)
+            if fail:
+                stats.count('errors')
+                return self._json(500, {'error': {'code': 500, 'status': 'INTERNAL', 'message': 'Stub failure'}})
+
+            tokens = self.answer_tokens(prompt, config.response_tokens)
+            if streaming:
+                self.stream(tokens, config.tokens_per_second)
+            else:
+                time.sleep(len(tokens) / config.tokens_per_second)
+                self._json(200, self.payload(' '.join(tokens), len(prompt.split()), len(tokens)))
+        finally:
+            stats.leave()
+
+    @staticmethod
+    def answer_tokens(prompt, count):
+        question = prompt.split('Question:')[-1].split('Answer:')[0].split()[:8]
+        tokens = ['Stub', 'answer', 'to:'] + question
+        while len(tokens) < count:
+            tokens.append(FILLER[len(tokens) % len(FILLER)])
+        return tokens[:max(count, 1)]
+
+    @staticmethod
+    def payload(text, prompt_tokens, output_tokens, finished=True):
+        candidate = {'content': {'role': 'model', 'parts': [{'text': text}]}, 'index': 0}
+        if finished:
+            candidate['finishReason'] = 'STOP'
+        return {
+            'candidates': [candidate],
+            'usageMetadata': {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': output_tokens},
+        }
+
+    def stream(self, tokens, tokens_per_second, tokens_per_chunk=8):
+        # Server-sent events; the connection closes at the end of the stream
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        for start in range(0, len(tokens), tokens_per_chunk):
+            chunk = tokens[start:start + tokens_per_chunk]
+            if start:
+                time.sleep(len(chunk) / tokens_per_second)
+            text = ' '.join(chunk) + (' ' if start + tokens_per_chunk < len(tokens) else '')
+            finished = start + tokens_per_chunk >= len(tokens)
+            event = json.dumps(self.payload(text, 0, len(chunk), finished))
+            self.wfile.write(f"data: {event}\r\n\r\n".encode())
+            self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.stats = StubStats()
+        self.rng_lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub(config=None, host='127.0.0.1', port=0):
+    """
+    Run a stub server on a background thread (port 0 picks a free port).
+    Returns the server; call shutdown() when done.
+    """
+    server = StubServer((host, port), config or StubConfig())
+    threading.Thread(target=server.serve_forever, name='llm-stub', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8808)
+    parser.add_argument('--latency-ms', type=float, default=500.0, help='time to first token')
+    parser.add_argument('--jitter-ms', type=float, default=100.0)
+    parser.add_argument('--tokens-per-second', type=float, default=60.0, help='output throughput per response')
+    parser.add_argument('--response-tokens', type=int, default=80)
+    parser.add_argument('--max-concurrency', type=int, default=32, help='requests beyond this get 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail with 500')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.tokens_per_second, args.response_tokens,
+                        args.max_concurrency, args.error_rate, args.seed)
+    server = StubServer((args.host, args.port), config)
+    print(f"LLM stub listening on {server.url} (latency {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms, "
+          f"{args.tokens_per_second:g} tok/s, {args.response_tokens} tokens, capacity {args.max_concurrency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats.snapshot()))
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
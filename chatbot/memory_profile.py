@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Memory footprint of the serving process, per component.
+
+Records RSS and tracemalloc deltas around each heavy import (torch, nltk, the
+HTTP client, sentence-transformers) and each load step (LLM client, NeuralNet
+weights, nltk data, the SentenceTransformer model, the embedding matrix), then
+the steady state after serving traffic. tracemalloc only sees Python-level
+allocations; tensors and numpy buffers show up in the RSS column.
+
+Enable it in a server with MEMORY_PROFILE=1 (or `api_server.py --profile-memory`)
+and read GET /admin/memory (only served when ADMIN_TOKEN is set, sent as
+X-Admin-Token), or run the full load here:
+
+    python memory_profile.py
+    python memory_profile.py --rag --requests 500
+    python memory_profile.py --budget-mb 900 --component-budget torch=450 --component-budget "NeuralNet weights"=5
+
+Exits non-zero when the total (MEMORY_BUDGET_MB, 600MB by default) or a
+component budget is exceeded, so it can gate deploys.
+"""
+
+import builtins
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+MEMORY_PROFILE = os.getenv('MEMORY_PROFILE', '0') == '1' or '--profile-memory' in sys.argv
+# Frames kept per tracemalloc trace; more is slower but attributes allocations better
+MEMORY_PROFILE_FRAMES = int(os.getenv('MEMORY_PROFILE_FRAMES', 1))
+
+# Default RSS budgets (MB) for the CLI check; 0 disables it. The Flask server
+# measures ~95MB before torch (flask, numpy, nltk, requests) and CPU torch
+# typically adds ~300MB; --rag also loads sentence-transformers and its model.
+MEMORY_BUDGET_MB = float(os.getenv('MEMORY_BUDGET_MB', 600))
+MEMORY_BUDGET_RAG_MB = float(os.getenv('MEMORY_BUDGET_RAG_MB', 1200))
+
+# Top-level modules whose first import is recorded as a component
+TRACKED_IMPORTS = {
+    'torch': 'torch',
+    'nltk': 'nltk',
+    'numpy': 'numpy',
+    'flask': 'flask',
+    'requests': 'requests (LLM client)',
+    'sentence_transformers': 'sentence-transformers',
+    'sklearn': 'scikit-learn',
+}
+
+
+def rss_bytes():
+    """
+    Current resident set size; falls back to the peak where /proc is missing
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _mb(n):
+    return round(n / (1024 * 1024), 2)
+
+
+class MemoryProfiler:
+    """
+    Per-component memory accounting. step() is a no-op until enable() is called.
+
+    Steps may nest (importing sentence-transformers imports torch); a step's
+    rss_mb and traced_mb exclude nested steps, total_rss_mb includes them.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.steps = []
+        self.stack = []
+        self.baseline_rss = None
+        self.started = None
+        self._original_import = None
+
+    def enable(self, frames=MEMORY_PROFILE_FRAMES, track_imports=True):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = time.time()
+        self.baseline_rss = rss_bytes()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        if track_imports:
+            self._hook_imports()
+
+    def _hook_imports(self):
+        original = self._original_import = builtins.__import__
+        profiler = self
+
+        def tracking_import(name, globals=None, locals=None, fromlist=(), level=0):
+            # `from sklearn.metrics.pairwise import ...` arrives as the dotted name;
+            # the component is the top-level package, recorded on its first import
+            top = name.partition('.')[0]
+            component = TRACKED_IMPORTS.get(top) if level == 0 else None
+            if component is None or top in sys.modules or threading.current_thread() is not threading.main_thread():
+                return original(name, globals, locals, fromlist, level)
+            with profiler.step(component, kind='import'):
+                return original(name, globals, locals, fromlist, level)
+
+        builtins.__import__ = tracking_import
+
+    def unhook_imports(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def step(self, name, kind='load'):
+        """
+        Record the memory a block of code adds.
+        """
+        if not self.enabled:
+            yield
+            return
+        entry = {'name': name, 'kind': kind, 'nested': 0, 'nested_traced': 0}
+        rss0, traced0 = rss_bytes(), tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        self.stack.append(entry)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            rss_delta = rss_bytes() - rss0
+            traced_delta = tracemalloc.get_traced_memory()[0] - traced0
+            entry.update({
+                'rss_mb': _mb(rss_delta - entry['nested']),
+                'total_rss_mb': _mb(rss_delta),
+                'traced_mb': _mb(traced_delta - entry['nested_traced']),
+                'seconds': round(time.perf_counter() - t0, 3),
+            })
+            if self.stack:
+                self.stack[-1]['nested'] += rss_delta
+                self.stack[-1]['nested_traced'] += traced_delta
+            with self.lock:
+                self.steps.append({k: v for k, v in entry.items() if not k.startswith('nested')})
+
+    def top_allocations(self, limit=10):
+        """
+        Largest live Python allocations, grouped by source file
+        """
+        if limit <= 0 or not tracemalloc.is_tracing():
+            return []
+        stats = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        )).statistics('filename')
+        return [{'file': str(stat.traceback[0].filename), 'mb': _mb(stat.size), 'blocks': stat.count}
+                for stat in stats[:limit]]
+
+    def report(self, top=10):
+        current_rss = rss_bytes()
+        with self.lock:
+            steps = list(self.steps)
+        report = {
+            'enabled': self.enabled,
+            'rss_mb': _mb(current_rss),
+            'components': steps,
+        }
+        if self.enabled:
+            traced, peak = tracemalloc.get_traced_memory()
+            accounted = sum(step['rss_mb'] for step in steps)
+            report.update({
+                'baseline_rss_mb': _mb(self.baseline_rss),
+                'unattributed_rss_mb': round(_mb(current_rss - self.baseline_rss) - accounted, 2),
+                'traced_mb': _mb(traced),
+                'traced_peak_mb': _mb(peak),
+                'uptime_seconds': round(time.time() - self.started, 1),
+                'top_allocations': self.top_allocations(top),
+            })
+        return report
+
+
+def format_report(report):
+    lines = [f"{'component':<28} {'kind':<7} {'rss':>9} {'incl.':>9} {'traced':>9} {'time':>7}"]
+    for step in report['components']:
+        lines.append(f"{step['name']:<28} {step['kind']:<7} {step['rss_mb']:>7.1f}MB {step['total_rss_mb']:>7.1f}MB "
+                     f"{step['traced_mb']:>7.1f}MB {step['seconds']:>6.2f}s")
+    if report['enabled']:
+        lines.append(f"\nbaseline {report['baseline_rss_mb']:.1f}MB, now {report['rss_mb']:.1f}MB "
+                     f"({report['unattributed_rss_mb']:.1f}MB not attributed to a component); "
+                     f"tracemalloc {report['traced_mb']:.1f}MB (peak {report['traced_peak_mb']:.1f}MB)")
+        if report['top_allocations']:
+            lines.append("\nlargest Python allocations:")
+            for alloc in report['top_allocations']:
+                lines.append(f"  {alloc['mb']:>7.2f}MB  {alloc['file']}")
+    else:
+        lines.append(f"rss {report['rss_mb']:.1f}MB (profiling disabled; set MEMORY_PROFILE=1)")
+    return '\n'.join(lines)
+
+
+def check_budget(report, total_mb=None, component_mb=None):
+    """
+    Returns a list of budget violations (empty when within budget)
+    """
+    failures = []
+    if total_mb is not None and report['rss_mb'] > total_mb:
+        failures.append(f"total RSS {report['rss_mb']:.1f}MB > budget {total_mb:.1f}MB")
+    by_name = {}
+    for step in report['components']:
+        by_name[step['name']] = by_name.get(step['name'], 0.0) + step['rss_mb']
+    for name, budget in (component_mb or {}).items():
+        if name not in by_name:
+            failures.append(f"{name}: not measured")
+        elif by_name[name] > budget:
+            failures.append(f"{name} {by_name[name]:.1f}MB > budget {budget:.1f}MB")
+    return failures
+
+
+# Shared by the modules that register load steps
+memory_profiler = MemoryProfiler()
+if MEMORY_PROFILE and __name__ != '__main__':
+    memory_profiler.enable()
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rag', action='store_true',
+                        help='also load the Vercel function (SentenceTransformer and embedding matrix)')
+    parser.add_argument('--requests', type=int, default=200, help='messages to classify for the steady state')
+    parser.add_argument('--budget-mb', type=float,
+                        help=f'total RSS budget (default {MEMORY_BUDGET_MB:g}, {MEMORY_BUDGET_RAG_MB:g} with --rag; 0 = off)')
+    parser.add_argument('--component-budget', action='append', default=[], metavar='NAME=MB')
+    parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+
+    # The instance api_server and pdf_processor register their steps on
+    # (this file runs as __main__, a separate module object)
+    from memory_profile import memory_profiler as profiler
+    profiler.enable()
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(here)
+
+    # Import-time: the Flask server as production loads it
+    import api_server
+
+    if args.rag:
+        sys.path.append(os.path.join(here, '..', 'front-end', 'api'))
+        import chat  # noqa: F401
+        from pdf_processor import get_pdf_processor
+        processor = get_pdf_processor()
+        with profiler.step('RAG query'):
+            processor.find_relevant_chunks('What courses are offered?')
+
+    # Steady state: classify real patterns, as /chat does, without calling Gemini
+    with open(os.path.join(here, 'intents.json')) as f:
+        patterns = [p for intent in json.load(f)['intents'] for p in intent['patterns']]
+    with profiler.step(f'{args.requests} requests', kind='steady'):
+        for i in range(args.requests):
+            message = patterns[i % len(patterns)]
+            api_server.get_local_response(message, classification=api_server.classify_message(message))
+
+    profiler.unhook_imports()
+    report = profiler.report()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+    component_budgets = {}
+    for item in args.component_budget:
+        name, _, value = item.rpartition('=')
+        component_budgets[name] = float(value)
+    budget_mb = args.budget_mb
+    if budget_mb is None:
+        budget_mb = MEMORY_BUDGET_RAG_MB if args.rag else MEMORY_BUDGET_MB
+    failures = check_budget(report, budget_mb or None, component_budgets)
+    if failures:
+        print('\nOVER BUDGET:\n  ' + '\n  '.join(failures), file=sys.stderr)
+        sys.exit(1)
+    if budget_mb or component_budgets:
+        print('\nWithin budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -34,6 +34,31 @@ def bag_of_words(tokenize_sentence, all_words):
 
     return bag 
 
+
+def encode_intents(intents, ignore_words=("?", "!", ",", ".")):
+    """
+    Turn intents.json into training arrays.
+    Returns (x, y, all_words, tags): bag-of-words rows, label indices,
+    the sorted stemmed vocabulary and the sorted tags.
+    """
+    all_words = []
+    tags = []
+    xy = []
+    for intent in intents['intents']:
+        tag = intent['tag']
+        tags.append(tag)
+        for pattern in intent['patterns']:
+            w = tokenize(pattern)
+            all_words.extend(w)
+            xy.append((w, tag))
+
+    all_words = sorted(set(stem(w) for w in all_words if w not in ignore_words))
+    tags = sorted(set(tags))
+
+    x = np.array([bag_of_words(pattern_sentence, all_words) for pattern_sentence, _ in xy])
+    y = np.array([tags.index(tag) for _, tag in xy])
+    return x, y, all_words, tags
+
 # sentence = ["hello", "how", "are", "you"]
 # words = ["hi", "hello", "I", "you", "bye", "thank", "cool"]
 # bag = bag_of_words(sentence, words)
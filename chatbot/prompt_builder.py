@@ -0,0 +1,148 @@
+import os
+import re
+import threading
+from string import Template
+
+# Upper bound on prompt size sent to Gemini, in (estimated) tokens
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 700))
+# Retrieved chunks scoring below this similarity are not worth their tokens
+RELEVANCE_FLOOR = float(os.getenv('RELEVANCE_FLOOR', 0.25))
+
+COLLEGE_PROMPT = """You are PCTE's (Punjab College of Technical Education) college assistant. \
+Answer concisely and helpfully. If you don't know something specific about the college, say so.
+
+${history}Question: $question
+Answer:"""
+
+RAG_PROMPT = """You are PCTE's (Punjab College of Technical Education) college assistant. \
+Answer concisely using the context. If it doesn't cover the question, answer from general \
+knowledge and say it may not be PCTE-specific.
+
+Context:
+$context
+
+${history}Question: $question
+Answer:"""
+
+_WORD = re.compile(r"\w+")
+
+
+def estimate_tokens(text):
+    """
+    Rough token count (~4 characters per token for English text).
+    """
+    return (len(text) + 3) // 4
+
+
+def _shingles(text, size=3):
+    words = _WORD.findall(text.lower())
+    return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+
+
+def _trim(text, max_chars):
+    """
+    Cut text to at most max_chars, preferring a sentence, then a word, boundary.
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    sentence_end = cut.rfind('. ')
+    if sentence_end >= max_chars // 2:
+        return cut[:sentence_end + 1]
+    space = cut.rfind(' ')
+    return cut[:space] if space > 0 else cut
+
+
+class PromptBuilder:
+    """
+    Assembles prompts from a precompiled template within a token budget.
+
+    Retrieved chunks are taken best-first: those under `relevance_floor` are
+    dropped, as are chunks that mostly repeat one already selected, and the
+    last chunk that fits is trimmed rather than overflowing the budget.
+    When no chunk survives, `no_context_template` (if given) is used instead.
+    Conversation history, when passed, fills $history and counts against the
+    budget before any chunk does.
+    """
+
+    def __init__(self, template=RAG_PROMPT, token_budget=PROMPT_TOKEN_BUDGET,
+                 relevance_floor=RELEVANCE_FLOOR, max_overlap=0.6, min_chunk_tokens=40,
+                 no_context_template=None):
+        self.template = Template(template)
+        self.no_context_template = Template(no_context_template) if no_context_template else None
+        self.token_budget = token_budget
+        self.relevance_floor = relevance_floor
+        self.max_overlap = max_overlap
+        self.min_chunk_tokens = min_chunk_tokens
+        self.base_tokens = estimate_tokens(self.template.safe_substitute(question='', context='', history=''))
+        self.requests = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.lock = threading.Lock()
+
+    def select_chunks(self, chunks, available_tokens):
+        """
+        Pick which (text, score) chunks go into the context.
+        Returns (selected_texts, dropped_count).
+        """
+        selected = []
+        selected_shingles = []
+        dropped = 0
+        remaining = available_tokens
+
+        for text, score in sorted(chunks, key=lambda c: c[1], reverse=True):
+            text = text.strip()
+            if not text or score < self.relevance_floor or remaining < self.min_chunk_tokens:
+                dropped += 1
+                continue
+
+            shingles = _shingles(text)
+            if any(len(shingles & seen) / max(1, min(len(shingles), len(seen))) >= self.max_overlap
+                   for seen in selected_shingles):
+                dropped += 1
+                continue
+
+            # +1 token for the blank line separating chunks
+            cost = estimate_tokens(text) + 1
+            if cost > remaining:
+                text = _trim(text, (remaining - 1) * 4)
+                cost = estimate_tokens(text) + 1
+            selected.append(text)
+            selected_shingles.append(shingles)
+            remaining -= cost
+
+        return selected, dropped
+
+    def build(self, question, chunks=(), history=''):
+        """
+        Returns (prompt, stats) where stats has prompt_tokens, context_chunks
+        and dropped_chunks.
+        """
+        history = f"Conversation so far:\n{history}\n\n" if history else ''
+        available = self.token_budget - self.base_tokens - estimate_tokens(question) - estimate_tokens(history)
+        selected, dropped = self.select_chunks(chunks, available)
+        template = self.template
+        if not selected and self.no_context_template is not None:
+            template = self.no_context_template
+        prompt = template.substitute(question=question, context='\n\n'.join(selected), history=history)
+
+        tokens = estimate_tokens(prompt)
+        with self.lock:
+            self.requests += 1
+            self.total_tokens += tokens
+            self.max_tokens = max(self.max_tokens, tokens)
+
+        return prompt, {
+            'prompt_tokens': tokens,
+            'context_chunks': len(selected),
+            'dropped_chunks': dropped,
+        }
+
+    def stats(self):
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'avg_prompt_tokens': round(self.total_tokens / self.requests, 1) if self.requests else 0.0,
+                'max_prompt_tokens': self.max_tokens,
+                'token_budget': self.token_budget,
+            }
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Replay a captured request log against a chat backend.
+
+Feeds the messages recorded by request_log.RequestLog (captured with
+REQUEST_LOG_TEXT=1) back into either backend, keeping the original
+inter-arrival gaps, compressing them, or sending as fast as possible.
+
+    python replay_log.py logs/requests.*.jsonl --url http://localhost:8000/chat
+    python replay_log.py logs/requests.*.jsonl* --speed 10     # with rotated backups
+    python replay_log.py logs/requests.1234.jsonl --url https://your-app.vercel.app/api/chat --speed 0
+
+Each server process writes its own logs/requests.<pid>.jsonl; events from
+all the files given are merged in timestamp order.
+
+Every replayed request comes from this host, so a Flask target would put
+them all in one rate-limit bucket and mostly answer 429. Start the target
+with TRUST_REPLAY_CLIENT=1 to rate-limit by the client key recorded in each
+event (sent as X-Replay-Client), or with RATE_LIMIT_PER_MIN=0 to turn the
+limiter off.
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench_utils import percentile
+
+
+def load_events(paths):
+    """
+    Read replayable events (those with message text) ordered by timestamp.
+    """
+    events = []
+    skipped = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get('text'):
+                    events.append(event)
+                else:
+                    skipped += 1
+    events.sort(key=lambda e: e['ts'])
+    return events, skipped
+
+
+def replay(events, url, speed, concurrency, timeout):
+    """
+    Send every event to `url`. `speed` is the time compression factor
+    (1 = original rate, 10 = ten times faster, 0 = no pacing).
+    Returns a list of result dicts.
+    """
+    results = []
+    lock = threading.Lock()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def send(event):
+        body = {'message': event['text']}
+        if event.get('timezone'):
+            body['timezone'] = event['timezone']
+        headers = {'X-Replay-Client': event['client']} if event.get('client') else None
+        t0 = time.perf_counter()
+        try:
+            response = session.post(url, json=body, headers=headers, timeout=timeout)
+            status = response.status_code
+            try:
+                source = response.json().get('response_source')
+            except ValueError:
+                source = None
+        except requests.RequestException as e:
+            status, source = type(e).__name__, None
+        result = {
+            'msg_hash': event.get('msg_hash'),
+            'status': status,
+            'latency_ms': (time.perf_counter() - t0) * 1000,
+            'route': source,
+            'original_route': event.get('route'),
+            'original_total_ms': (event.get('timings') or {}).get('total'),
+        }
+        with lock:
+            results.append(result)
+
+    first_ts = events[0]['ts']
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        for event in events:
+            if speed > 0:
+                delay = start + (event['ts'] - first_ts) / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, event)
+    return results
+
+
+def report(results, wall):
+    latencies = [r['latency_ms'] for r in results]
+    print(f"Sent {len(results)} requests in {wall:.1f}s ({len(results) / max(wall, 1e-9):.1f} req/s)")
+    print(f"Latency p50={percentile(latencies, 50):.1f}ms  p95={percentile(latencies, 95):.1f}ms  "
+          f"p99={percentile(latencies, 99):.1f}ms")
+    print("Status: " + ", ".join(f"{k}={v}" for k, v in Counter(r['status'] for r in results).most_common()))
+    print("Routes: " + ", ".join(f"{k}={v}" for k, v in Counter(r['route'] for r in results).most_common()))
+
+    original = [r['original_total_ms'] for r in results if r['original_total_ms'] is not None]
+    if original:
+        print(f"Captured server time p50={percentile(original, 50):.1f}ms  p99={percentile(original, 99):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('logs', nargs='+', help='JSONL request logs (oldest first)')
+    parser.add_argument('--url', default='http://localhost:8000/chat', help='/chat or /api/chat endpoint')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='time compression: 1 = original rate, 10 = 10x faster, 0 = unpaced')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--limit', type=int, help='replay only the first N events')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--out', help='write per-request results as JSONL')
+    args = parser.parse_args()
+
+    events, skipped = load_events(args.logs)
+    if skipped:
+        print(f"Skipping {skipped} events without message text (capture with REQUEST_LOG_TEXT=1)")
+    if args.limit:
+        events = events[:args.limit]
+    if not events:
+        print("Nothing to replay")
+        return
+
+    start = time.perf_counter()
+    results = replay(events, args.url, args.speed, args.concurrency, args.timeout)
+    report(results, time.perf_counter() - start)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
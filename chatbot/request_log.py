@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Default location for request events; REQUEST_LOG_PATH overrides it and
+# an empty REQUEST_LOG_PATH disables logging. Each process writes (and
+# rotates) its own file, with its pid added: logs/requests.<pid>.jsonl
+DEFAULT_LOG_PATH = os.path.join('logs', 'requests.jsonl')
+# Store the raw message text (needed for replay) instead of only its hash
+REQUEST_LOG_TEXT = os.getenv('REQUEST_LOG_TEXT', '0') == '1'
+REQUEST_LOG_MAX_BYTES = int(os.getenv('REQUEST_LOG_MAX_BYTES', 50 * 1024 * 1024))
+REQUEST_LOG_BACKUPS = int(os.getenv('REQUEST_LOG_BACKUPS', 5))
+
+
+def message_hash(message):
+    return hashlib.sha256(message.encode('utf-8')).hexdigest()[:16]
+
+
+def client_hash(client):
+    """
+    Stable pseudonymous key for a client (its rate-limit key), so a replay
+    can spread requests over the same clients without logging addresses
+    """
+    return hashlib.sha256(f"client:{client}".encode('utf-8')).hexdigest()[:16]
+
+
+class RequestLog:
+    """
+    Structured per-request event log written by a background thread.
+
+    record() never blocks: events go into a bounded in-memory queue, and the
+    writer thread drains it in batches to a size-rotated JSONL file. Once the
+    queue is past `sample_above` full, events are sampled (the kept ones carry
+    their `sample_rate`) and when it is completely full they are dropped.
+    """
+
+    def __init__(self, path, log_text=False, max_queue=10000, batch_size=256, flush_interval=1.0,
+                 max_bytes=REQUEST_LOG_MAX_BYTES, backup_count=REQUEST_LOG_BACKUPS,
+                 sample_above=0.5, min_sample_rate=0.05):
+        self.path = path
+        self.log_text = log_text
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.sample_above = sample_above
+        self.min_sample_rate = min_sample_rate
+        self.written = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self._stop = object()
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name='request-log', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls, default_path=DEFAULT_LOG_PATH):
+        """
+        Build the log from REQUEST_LOG_* settings, or return None if disabled.
+        The path gets the process id so gunicorn workers never share a file.
+        """
+        path = os.getenv('REQUEST_LOG_PATH', default_path)
+        if not path:
+            return None
+        root, ext = os.path.splitext(path)
+        return cls(f"{root}.{os.getpid()}{ext}", log_text=REQUEST_LOG_TEXT)
+
+    def _sample_rate(self):
+        fill = self.queue.qsize() / self.queue.maxsize
+        if fill <= self.sample_above:
+            return 1.0
+        rate = (1.0 - fill) / (1.0 - self.sample_above)
+        return max(self.min_sample_rate, rate)
+
+    def record(self, message, **fields):
+        """
+        Queue one request event. `fields` typically holds tag, confidence,
+        route, timings (a dict of stage -> milliseconds) and cache_hit.
+        """
+        rate = self._sample_rate()
+        if rate < 1.0 and random.random() >= rate:
+            self.sampled_out += 1
+            return
+
+        event = {'ts': time.time(), 'msg_hash': message_hash(message)}
+        if self.log_text:
+            event['text'] = message
+        event.update(fields)
+        if rate < 1.0:
+            event['sample_rate'] = round(rate, 3)
+
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self):
+        return {
+            'queued': self.queue.qsize(),
+            'written': self.written,
+            'sampled_out': self.sampled_out,
+            'dropped': self.dropped,
+        }
+
+    def close(self, timeout=5.0):
+        """
+        Flush pending events and stop the writer thread.
+        """
+        self.queue.put(self._stop)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            stop = item is self._stop
+            if not stop:
+                batch.append(item)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._stop:
+                    stop = True
+                else:
+                    batch.append(item)
+
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    # Logging must never take the service down; lose the batch instead
+                    self.dropped += len(batch)
+            if stop:
+                if self._file:
+                    self._file.close()
+                return
+
+    def _write(self, batch):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+
+        self._file.write(''.join(json.dumps(event, separators=(',', ':')) + '\n' for event in batch))
+        self._file.flush()
+        self.written += len(batch)
+
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class StageTimer:
+    """
+    Collects per-stage wall-clock timings in milliseconds.
+
+        timer = StageTimer()
+        with timer.stage('classify'):
+            ...
+        timer.total()  # {'classify': 1.42, 'total': 1.57}
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - t0) * 1000, 3)
+
+    def total(self):
+        self.timings['total'] = round((time.perf_counter() - self.started) * 1000, 3)
+        return self.timings
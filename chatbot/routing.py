@@ -0,0 +1,18 @@
+# Routing rules shared by the API server and the exported browser classifier
+
+# Messages containing any of these go straight to Gemini
+GEMINI_KEYWORDS = [
+    'what is', 'explain', 'tell me about', 'how does', 'define',
+    'artificial intelligence', 'machine learning', 'quantum', 'physics',
+    'chemistry', 'biology', 'history', 'cooking', 'recipe', 'weather',
+    'news', 'sports', 'entertainment', 'technology', 'programming',
+    'philosophy', 'psychology', 'economics', 'politics', 'science',
+    'travel', 'health', 'fitness', 'music', 'movies', 'books'
+]
+
+# Intents whose answer is computed on the server (date/time) rather than
+# picked from intents.json
+DYNAMIC_TAGS = ['current_time', 'current_date', 'day_today', 'day_tomorrow']
+
+# Minimum classifier confidence for a local intent answer
+CONFIDENCE_THRESHOLD = 0.8
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Parallel hyperparameter search for the intent classifier.
+
+intents.json is encoded once and placed in shared memory; a process pool
+attaches to it (no per-worker copies or re-tokenizing) and trains one
+candidate config per task, each worker pinned to its own CPU cores with a
+fixed torch thread count. Every config is scored on the same k folds (or one
+fixed validation split), then ranked by validation accuracy, inference
+latency and model size. The winner is retrained on all patterns and saved
+in the usual data.pth format.
+
+    python search.py
+    python search.py --workers 4 --folds 5 --hidden-sizes 16,32,64 --learning-rates 1e-3,5e-3
+    python search.py --val-split 0.15 --dry-run
+"""
+
+import argparse
+import io
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from model import NeuralNet
+from nltk_utils import encode_intents
+
+# Set in each worker by _init_worker
+_x = None
+_y = None
+_num_classes = None
+_segments = []
+
+
+def _csv(cast):
+    return lambda value: [cast(v) for v in value.split(',') if v.strip()]
+
+
+def share_array(array):
+    """
+    Copy an array into a new shared memory segment.
+    Returns (segment, spec) where spec lets a worker attach to it.
+    """
+    segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+    return segment, (segment.name, array.shape, array.dtype.str)
+
+
+def _attach(spec):
+    name, shape, dtype = spec
+    segment = shared_memory.SharedMemory(name=name)
+    _segments.append(segment)  # keep the mapping alive for the worker's lifetime
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+
+
+def _init_worker(x_spec, y_spec, num_classes, core_groups, threads):
+    global _x, _y, _num_classes
+    # One core group per worker; the parent filled the queue with exactly one per process
+    if core_groups is not None and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, core_groups.get(timeout=5))
+        except Exception:
+            pass
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    # Zero-copy views over the parent's encoded dataset
+    _x = torch.from_numpy(_attach(x_spec))
+    _y = torch.from_numpy(_attach(y_spec))
+    _num_classes = num_classes
+
+
+def _train(config, train_idx, val_idx, max_epochs, patience, seed):
+    """
+    Train one model; returns (model, best_val_acc, best_epoch).
+    With no validation indices, trains for exactly max_epochs.
+    """
+    torch.manual_seed(seed)
+    generator = torch.Generator().manual_seed(seed)
+    x_train, y_train = _x[train_idx], _y[train_idx]
+    model = NeuralNet(_x.shape[1], config['hidden_size'], _num_classes)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=config['learning_rate'])
+
+    best_acc, best_epoch, best_state = -1.0, max_epochs, None
+    for epoch in range(max_epochs):
+        model.train()
+        order = torch.randperm(len(train_idx), generator=generator)
+        for start in range(0, len(order), config['batch_size']):
+            batch = order[start:start + config['batch_size']]
+            loss = criterion(model(x_train[batch]), y_train[batch])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+        if len(val_idx) == 0:
+            continue
+        model.eval()
+        with torch.no_grad():
+            acc = (model(_x[val_idx]).argmax(dim=1) == _y[val_idx]).float().mean().item()
+        if acc > best_acc + 1e-4:
+            best_acc, best_epoch = acc, epoch + 1
+            best_state = {k: v.clone() for k, v in model.state_dict().items()}
+        elif epoch + 1 - best_epoch >= patience:
+            break
+
+    if best_state is not None:
+        model.load_state_dict(best_state)
+    return model, best_acc, best_epoch
+
+
+def _latency_us(model, samples=300):
+    """
+    Median single-message inference time, as the API server runs it
+    """
+    model.eval()
+    x = _x[:1].clone()
+    timings = []
+    with torch.no_grad():
+        for _ in range(20):
+            model(x)
+        for _ in range(samples):
+            t0 = time.perf_counter()
+            torch.softmax(model(x), dim=1)
+            timings.append((time.perf_counter() - t0) * 1e6)
+    return float(np.median(timings))
+
+
+def _model_bytes(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def evaluate_config(config, folds, max_epochs, patience, seed):
+    """
+    Worker task: cross-validate one config.
+    """
+    t0 = time.perf_counter()
+    accuracies, epochs = [], []
+    model = None
+    for i, (train_idx, val_idx) in enumerate(folds):
+        model, acc, best_epoch = _train(config, torch.from_numpy(train_idx), torch.from_numpy(val_idx),
+                                        max_epochs, patience, seed + i)
+        accuracies.append(acc)
+        epochs.append(best_epoch)
+    return {
+        'config': config,
+        'val_accuracy': float(np.mean(accuracies)),
+        'val_accuracy_std': float(np.std(accuracies)),
+        'epochs': int(round(np.mean(epochs))),
+        'latency_us': round(_latency_us(model), 1),
+        'params': sum(p.numel() for p in model.parameters()),
+        'size_bytes': _model_bytes(model),
+        'train_seconds': round(time.perf_counter() - t0, 2),
+        'worker_pid': os.getpid(),
+    }
+
+
+def fit_final(config, epochs, seed):
+    """
+    Worker task: train the chosen config on every pattern.
+    Returns the state dict.
+    """
+    all_idx = torch.arange(_x.shape[0])
+    model, _, _ = _train(config, all_idx, torch.empty(0, dtype=torch.long), epochs, epochs, seed)
+    return model.state_dict()
+
+
+def make_folds(y, folds, val_split, seed):
+    """
+    k stratified folds, or a single fixed split when folds < 2
+    """
+    rng = np.random.default_rng(seed)
+    if folds < 2:
+        order = rng.permutation(len(y))
+        val_size = max(1, int(val_split * len(y)))
+        return [(np.sort(order[val_size:]), np.sort(order[:val_size]))]
+
+    # Deal each tag's patterns round-robin so every fold sees every tag
+    assignment = np.empty(len(y), dtype=np.int64)
+    offset = 0
+    for label in np.unique(y):
+        members = rng.permutation(np.flatnonzero(y == label))
+        assignment[members] = (np.arange(len(members)) + offset) % folds
+        offset += len(members)
+    return [(np.flatnonzero(assignment != k), np.flatnonzero(assignment == k)) for k in range(folds)]
+
+
+def core_groups(workers, threads):
+    """
+    Split the CPUs this process may use into one set per worker
+    """
+    if not hasattr(os, 'sched_getaffinity'):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < workers:
+        return None
+    per_worker = max(1, min(threads, len(cpus) // workers))
+    return [set(cpus[i * per_worker:(i + 1) * per_worker]) for i in range(workers)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--intents', default='intents.json')
+    parser.add_argument('--out', default='data.pth')
+    parser.add_argument('--leaderboard', default='search_leaderboard.json')
+    parser.add_argument('--hidden-sizes', type=_csv(int), default=[16, 32, 64, 128])
+    parser.add_argument('--learning-rates', type=_csv(float), default=[1e-3, 5e-3, 1e-2])
+    parser.add_argument('--batch-sizes', type=_csv(int), default=[8, 16, 32])
+    parser.add_argument('--epochs', type=int, default=600, help='maximum epochs per fold')
+    parser.add_argument('--patience', type=int, default=30, help='stop a fold after this many epochs without improvement')
+    parser.add_argument('--folds', type=int, default=5, help='k-fold cross-validation; < 2 uses --val-split')
+    parser.add_argument('--val-split', type=float, default=0.15)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dry-run', action='store_true', help="rank configs but don't write data.pth")
+    args = parser.parse_args()
+
+    with open(args.intents, 'r') as f:
+        intents = json.load(f)
+    x, y, all_words, tags = encode_intents(intents)
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    y = np.ascontiguousarray(y, dtype=np.int64)
+    folds = make_folds(y, args.folds, args.val_split, args.seed)
+    configs = [{'hidden_size': h, 'learning_rate': lr, 'batch_size': b}
+               for h, lr, b in itertools.product(args.hidden_sizes, args.learning_rates, args.batch_sizes)]
+
+    print(f"{len(x)} patterns, {len(all_words)} words, {len(tags)} tags; {len(configs)} configs x "
+          f"{len(folds)} fold(s) on {args.workers} workers x {args.threads_per_worker} thread(s)")
+
+    # Spawned workers don't inherit torch/OpenMP state from this process
+    ctx = mp.get_context('spawn')
+    groups = core_groups(args.workers, args.threads_per_worker)
+    group_queue = None
+    if groups is not None:
+        group_queue = ctx.Queue()
+        for group in groups:
+            group_queue.put(group)
+
+    x_segment, x_spec = share_array(x)
+    y_segment, y_spec = share_array(y)
+    results = []
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(x_spec, y_spec, len(tags), group_queue, args.threads_per_worker)) as pool:
+            futures = [pool.submit(evaluate_config, config, folds, args.epochs, args.patience, args.seed)
+                       for config in configs]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                c = result['config']
+                print(f"[{done}/{len(configs)}] hidden={c['hidden_size']} lr={c['learning_rate']:g} "
+                      f"batch={c['batch_size']}: acc={result['val_accuracy']:.3f} ({result['train_seconds']}s)")
+
+            results.sort(key=lambda r: (-round(r['val_accuracy'], 3), r['latency_us'], r['size_bytes']))
+            best = results[0]
+            state = None
+            if not args.dry_run:
+                state = pool.submit(fit_final, best['config'], best['epochs'], args.seed).result()
+    finally:
+        for segment in (x_segment, y_segment):
+            segment.close()
+            segment.unlink()
+    elapsed = time.perf_counter() - t0
+
+    with open(args.leaderboard, 'w') as f:
+        json.dump({'folds': len(folds), 'patterns': len(x), 'elapsed_seconds': round(elapsed, 1),
+                   'results': [dict(r, rank=i + 1) for i, r in enumerate(results)]}, f, indent=2)
+
+    print(f"\n{'rank':<5} {'hidden':>6} {'lr':>7} {'batch':>5} {'val_acc':>8} {'±':>6} "
+          f"{'epochs':>6} {'latency':>9} {'size':>8}")
+    for rank, r in enumerate(results[:10], 1):
+        c = r['config']
+        print(f"{rank:<5} {c['hidden_size']:>6} {c['learning_rate']:>7g} {c['batch_size']:>5} "
+              f"{r['val_accuracy']:>8.3f} {r['val_accuracy_std']:>6.3f} {r['epochs']:>6} "
+              f"{r['latency_us']:>7.1f}us {r['size_bytes'] / 1024:>6.1f}KB")
+    print(f"\n{len(results)} configs in {elapsed:.1f}s; leaderboard written to {args.leaderboard}")
+
+    if state is not None:
+        torch.save({
+            "model_state": state,
+            "input_size": x.shape[1],
+            "output_size": len(tags),
+            "hidden_size": best['config']['hidden_size'],
+            "all_words": all_words,
+            "tags": tags
+        }, args.out)
+        print(f"Saved the best config ({best['config']}, {best['epochs']} epochs) to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from prompt_builder import _trim, estimate_tokens
+
+# Recent turns kept per session; older ones are folded into the summary
+SESSION_TURNS = int(os.getenv('SESSION_TURNS', 6))
+# Characters stored per turn. Only this much of a reply is ever rendered, and
+# capping both sides bounds a session at roughly SESSION_TURNS x (message + reply)
+TURN_MESSAGE_CHARS = int(os.getenv('TURN_MESSAGE_CHARS', 500))
+TURN_REPLY_CHARS = int(os.getenv('TURN_REPLY_CHARS', 240))
+# Sessions kept across all chats; the least recently active is evicted first.
+# With the per-turn caps above this bounds the store's memory, not just its size
+SESSION_MAX = int(os.getenv('SESSION_MAX', 10000))
+# Seconds of inactivity after which a session is dropped
+SESSION_TTL = float(os.getenv('SESSION_TTL', 1800))
+# Token budgets for the rendered history and for the summary within it
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', 250))
+SUMMARY_TOKEN_BUDGET = int(os.getenv('SUMMARY_TOKEN_BUDGET', 60))
+# SQLite file shared by all workers. When unset, a single worker keeps
+# sessions in memory and several workers (WEB_CONCURRENCY > 1, as read by
+# gunicorn.conf.py) share DEFAULT_SESSION_DB, since each worker's memory
+# store would only see the turns it happened to serve
+SESSION_DB = os.getenv('SESSION_DB')
+DEFAULT_SESSION_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sessions.db')
+
+_WORD = re.compile(r"[\w']+")
+# secrets.token_urlsafe(32): 43 URL-safe characters
+_SESSION_TOKEN = re.compile(r'[A-Za-z0-9_-]{43}')
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'about', 'can', 'could', 'do', 'does', 'for', 'how', 'i', 'in', 'is', 'it',
+    'its', 'me', 'my', 'of', 'on', 'please', 'tell', 'the', 'there', 'this', 'to', 'what', 'whats',
+    "what's", 'when', 'where', 'which', 'who', 'will', 'with', 'you', 'your', 'any', 'be', 'also',
+}
+
+
+def new_session_token():
+    """
+    Random chat id issued by the server (256 bits), so one chat's history
+    can't be reached by guessing or choosing another's id
+    """
+    return secrets.token_urlsafe(32)
+
+
+def is_session_token(value):
+    """
+    True for a value shaped like new_session_token() output
+    """
+    return isinstance(value, str) and _SESSION_TOKEN.fullmatch(value) is not None
+
+
+def compress_turn(user_message, max_words=6):
+    """
+    Keep the content words of an old question (its topic) for the summary
+    """
+    words = [w for w in _WORD.findall(user_message.lower()) if w not in _STOPWORDS]
+    return ' '.join(words[:max_words])
+
+
+class Session:
+    """
+    One conversation: a ring buffer of recent (user, assistant) turns plus
+    a compact summary (topics of the turns that fell out of the buffer).
+    """
+
+    __slots__ = ('turns', 'topics', 'updated')
+
+    def __init__(self, turns=(), topics=(), updated=None, max_turns=SESSION_TURNS):
+        self.turns = deque((tuple(turn) for turn in turns), maxlen=max_turns)
+        self.topics = list(topics)
+        self.updated = updated if updated is not None else time.time()
+
+    def add_turn(self, user_message, response, summary_budget=SUMMARY_TOKEN_BUDGET):
+        if len(self.turns) == self.turns.maxlen:
+            topic = compress_turn(self.turns[0][0])
+            if topic and topic not in self.topics[-3:]:
+                self.topics.append(topic)
+            while self.topics and estimate_tokens('; '.join(self.topics)) > summary_budget:
+                self.topics.pop(0)
+        # Stored trimmed: /chat doesn't limit message length and only the
+        # start of a reply is rendered, so full texts would just hold memory
+        self.turns.append((_trim(user_message, TURN_MESSAGE_CHARS), _trim(response, TURN_REPLY_CHARS)))
+        self.updated = time.time()
+
+    def render(self, token_budget=HISTORY_TOKEN_BUDGET, reply_chars=TURN_REPLY_CHARS):
+        """
+        History text for the prompt, newest turns first to be kept when
+        the budget runs out
+        """
+        if not self.turns and not self.topics:
+            return ''
+        summary = f"Earlier topics: {'; '.join(self.topics)}" if self.topics else ''
+        remaining = token_budget - estimate_tokens(summary)
+        lines = []
+        for user_message, response in reversed(self.turns):
+            turn = f"User: {user_message}\nAssistant: {_trim(response, reply_chars)}"
+            cost = estimate_tokens(turn) + 1
+            if cost > remaining:
+                break
+            lines.append(turn)
+            remaining -= cost
+        if summary:
+            lines.append(summary)
+        return '\n'.join(reversed(lines))
+
+    def dumps(self):
+        return json.dumps({'t': list(self.turns), 's': self.topics}, separators=(',', ':'))
+
+    @classmethod
+    def loads(cls, data, updated, max_turns=SESSION_TURNS):
+        payload = json.loads(data)
+        return cls(payload.get('t', ()), payload.get('s', ()), updated, max_turns)
+
+
+class MemorySessionStore:
+    """
+    Sessions in this process, with LRU eviction past `max_sessions` and
+    TTL expiry. The dict is kept in last-activity order, so expired sessions
+    are always at the front and sweeping stops at the first live one.
+    """
+
+    def __init__(self, max_sessions=SESSION_MAX, ttl=SESSION_TTL, max_turns=SESSION_TURNS,
+                 summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.summary_budget = summary_budget
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evicted': 0, 'expired': 0}
+
+    def _expire(self, now):
+        # Caller holds self.lock
+        cutoff = now - self.ttl
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.updated >= cutoff:
+                break
+            del self.sessions[session_id]
+            self.counters['expired'] += 1
+
+    def history(self, session_id, token_budget=HISTORY_TOKEN_BUDGET):
+        """
+        Rendered history for the prompt ('' for a new or expired session)
+        """
+        with self.lock:
+            self._expire(time.time())
+            session = self.sessions.get(session_id)
+            if session is None:
+                self.counters['misses'] += 1
+                return ''
+            self.counters['hits'] += 1
+            return session.render(token_budget)
+
+    def append(self, session_id, user_message, response):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = Session(max_turns=self.max_turns)
+            else:
+                self.sessions.move_to_end(session_id)
+            session.add_turn(user_message, response, self.summary_budget)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+                self.counters['evicted'] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, backend='memory', sessions=len(self.sessions),
+                        max_sessions=self.max_sessions, ttl=self.ttl)
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite file (WAL mode) so every worker process sees the
+    same conversations. Expired and over-limit sessions are swept every
+    `sweep_every` writes rather than on each request.
+    """
+
+    def __init__(self, path=SESSION_DB, max_sessions=SESSION_MAX, ttl=SESSION_TTL, max_turns=SESSION_TURNS,
+                 summary_budget=SUMMARY_TOKEN_BUDGET, sweep_every=256):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.summary_budget = summary_budget
+        self.sweep_every = sweep_every
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evicted': 0, 'expired': 0}
+        self.writes = 0
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS sessions '
+                     '(id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)')
+
+    def _conn(self):
+        # One connection per thread; sqlite3 connections aren't shared across threads
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def history(self, session_id, token_budget=HISTORY_TOKEN_BUDGET):
+        row = self._conn().execute('SELECT data, updated FROM sessions WHERE id = ?', (session_id,)).fetchone()
+        if row is None or row[1] < time.time() - self.ttl:
+            self._count('misses')
+            return ''
+        self._count('hits')
+        return Session.loads(row[0], row[1], self.max_turns).render(token_budget)
+
+    def append(self, session_id, user_message, response):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data, updated FROM sessions WHERE id = ?', (session_id,)).fetchone()
+            if row is None or row[1] < time.time() - self.ttl:
+                session = Session(max_turns=self.max_turns)
+            else:
+                session = Session.loads(row[0], row[1], self.max_turns)
+            session.add_turn(user_message, response, self.summary_budget)
+            conn.execute('INSERT OR REPLACE INTO sessions (id, data, updated) VALUES (?, ?, ?)',
+                         (session_id, session.dumps(), session.updated))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+        with self.lock:
+            self.writes += 1
+            sweep = self.writes % self.sweep_every == 0
+        if sweep:
+            self.sweep()
+
+    def sweep(self):
+        conn = self._conn()
+        expired = conn.execute('DELETE FROM sessions WHERE updated < ?', (time.time() - self.ttl,)).rowcount
+        evicted = conn.execute('DELETE FROM sessions WHERE id IN '
+                               '(SELECT id FROM sessions ORDER BY updated DESC LIMIT -1 OFFSET ?)',
+                               (self.max_sessions,)).rowcount
+        self._count('expired', expired)
+        self._count('evicted', evicted)
+
+    def stats(self):
+        sessions = self._conn().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+        with self.lock:
+            return dict(self.counters, backend='sqlite', sessions=sessions,
+                        max_sessions=self.max_sessions, ttl=self.ttl)
+
+
+def create_session_store():
+    """
+    SQLite store when SESSION_DB is set or more than one worker runs,
+    otherwise in-process memory
+    """
+    if SESSION_DB:
+        return SQLiteSessionStore(SESSION_DB)
+    if int(os.getenv('WEB_CONCURRENCY', 1)) > 1:
+        return SQLiteSessionStore(DEFAULT_SESSION_DB)
+    return MemorySessionStore()
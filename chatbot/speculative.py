@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Start downstream work (retrieval, optionally the LLM call) while the local
+# classifier is still deciding
+SPECULATIVE_PIPELINE = os.getenv('SPECULATIVE_PIPELINE', '0') == '1'
+# Also speculate the LLM call itself; discarded calls still cost a request
+SPECULATIVE_LLM = os.getenv('SPECULATIVE_LLM', '0') == '1'
+SPECULATIVE_WORKERS = int(os.getenv('SPECULATIVE_WORKERS', 8))
+# Vocabulary coverage below which the router treats a message as uncertain
+SPECULATE_BELOW_COVERAGE = float(os.getenv('SPECULATE_BELOW_COVERAGE', 0.6))
+
+
+def low_coverage(words, vocabulary, threshold=SPECULATE_BELOW_COVERAGE):
+    """
+    Cheap pre-check before classification: messages whose words are mostly
+    outside the router's vocabulary rarely get a local answer, so they are
+    the ones worth speculating on
+    """
+    if not words:
+        return False
+    coverage = sum(1 for w in words if w in vocabulary) / len(words)
+    return coverage < threshold
+
+
+class Speculation:
+    """
+    Handle to one piece of speculative work.
+    Call result() to use it, or discard() once the local answer is good enough.
+    """
+
+    def __init__(self, pipeline, fn, args, kwargs):
+        self.pipeline = pipeline
+        self.elapsed_ms = None
+        self.future = pipeline.pool.submit(self._run, fn, args, kwargs)
+
+    def _run(self, fn, args, kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.elapsed_ms = (time.perf_counter() - t0) * 1000
+
+    def result(self, timeout=None):
+        value = self.future.result(timeout)
+        self.pipeline._count('used', self.elapsed_ms)
+        return value
+
+    def discard(self):
+        if self.future.cancel():
+            self.pipeline._count('cancelled')
+        else:
+            # Already running: let it finish and account for the wasted time
+            self.future.add_done_callback(lambda _: self.pipeline._count('discarded', self.elapsed_ms))
+
+
+class SpeculativePipeline:
+    """
+    Small thread pool for speculative work with wasted-work accounting.
+    """
+
+    def __init__(self, max_workers=SPECULATIVE_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='speculative')
+        self.lock = threading.Lock()
+        self.counters = {'launched': 0, 'used': 0, 'discarded': 0, 'cancelled': 0}
+        self.used_ms = 0.0
+        self.wasted_ms = 0.0
+
+    def start(self, fn, *args, **kwargs):
+        with self.lock:
+            self.counters['launched'] += 1
+        return Speculation(self, fn, args, kwargs)
+
+    def _count(self, outcome, elapsed_ms=None):
+        with self.lock:
+            self.counters[outcome] += 1
+            if elapsed_ms is not None:
+                if outcome == 'used':
+                    self.used_ms += elapsed_ms
+                else:
+                    self.wasted_ms += elapsed_ms
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['used_ms'] = round(self.used_ms, 1)
+            stats['wasted_ms'] = round(self.wasted_ms, 1)
+            return stats
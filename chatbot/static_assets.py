@@ -0,0 +1,144 @@
+import hashlib
+import mmap
+import os
+import threading
+from datetime import datetime, timezone
+
+from flask import Response, request
+from werkzeug.http import is_resource_modified
+from werkzeug.wsgi import wrap_file
+
+# Cache lifetime for static assets (defaults to 30 days)
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 60 * 60 * 24 * 30))
+
+# When the app runs behind nginx, set this to an `internal` location prefix
+# (e.g. "/protected/") so nginx streams the file and the worker returns at once
+ACCEL_REDIRECT_PREFIX = os.getenv('STATIC_ACCEL_REDIRECT_PREFIX')
+
+BLOCK_SIZE = 64 * 1024
+
+_etag_cache = {}
+_etag_lock = threading.Lock()
+
+
+def file_etag(path):
+    """
+    Strong ETag for a file, derived from a hash of its content.
+    The file is hashed through a memory map and the result is cached until
+    the file's size or modification time changes.
+    """
+    st = os.stat(path)
+    key = (st.st_size, st.st_mtime_ns)
+
+    with _etag_lock:
+        cached = _etag_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    if st.st_size:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                digest.update(mm)
+    etag = digest.hexdigest()[:32]
+
+    with _etag_lock:
+        _etag_cache[path] = (key, etag)
+    return etag
+
+
+class _FileRange:
+    """
+    Iterate over `length` bytes of an open file in fixed-size blocks.
+    Used when the WSGI server does not provide `wsgi.file_wrapper`.
+    """
+
+    def __init__(self, f, length, block_size=BLOCK_SIZE):
+        self.f = f
+        self.remaining = length
+        self.block_size = block_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining <= 0:
+            raise StopIteration
+        chunk = self.f.read(min(self.block_size, self.remaining))
+        if not chunk:
+            raise StopIteration
+        self.remaining -= len(chunk)
+        return chunk
+
+    def close(self):
+        self.f.close()
+
+
+def _file_body(path, start, length):
+    """
+    Open `path` positioned at `start` and wrap it for the WSGI server.
+    Servers with a native file wrapper (gunicorn, uWSGI) hand the descriptor
+    to os.sendfile(), bounded by the Content-Length we set, so the bytes are
+    never copied into Python memory.
+    """
+    f = open(path, 'rb')
+    f.seek(start)
+    if 'wsgi.file_wrapper' in request.environ:
+        return wrap_file(request.environ, f, BLOCK_SIZE)
+    return _FileRange(f, length)
+
+
+def send_static_asset(path, mimetype='application/octet-stream', max_age=STATIC_MAX_AGE):
+    """
+    Serve a static file with strong ETags, 304 revalidation, single byte
+    ranges (206/416) and long-lived cache headers.
+    Raises FileNotFoundError if the file does not exist.
+    """
+    st = os.stat(path)
+    size = st.st_size
+    etag = file_etag(path)
+    last_modified = datetime.fromtimestamp(int(st.st_mtime), timezone.utc)
+
+    response = Response(mimetype=mimetype, direct_passthrough=True)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.accept_ranges = 'bytes'
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response.status_code = 304
+        return response
+
+    if ACCEL_REDIRECT_PREFIX:
+        # nginx serves the bytes (and any range) from disk; the worker is freed immediately
+        response.headers['X-Accel-Redirect'] = ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + os.path.basename(path)
+        return response
+
+    start, length = 0, size
+    byte_range = request.range
+    # Honour If-Range: only serve a partial response if the client's copy is current
+    if_range = request.if_range
+    if byte_range is not None and if_range and (if_range.etag or if_range.date):
+        if if_range.etag:
+            current = if_range.etag == etag
+        else:
+            current = last_modified <= if_range.date
+        if not current:
+            byte_range = None
+
+    if byte_range is not None and len(byte_range.ranges) == 1:
+        span = byte_range.range_for_length(size)
+        if span is None:
+            response.status_code = 416
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+        start, stop = span
+        length = stop - start
+        response.status_code = 206
+        response.content_range = byte_range.make_content_range(size)
+
+    response.content_length = length
+    if request.method != 'HEAD':
+        response.response = _file_body(path, start, length)
+    return response
@@ -0,0 +1,294 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import torch
+
+from model import NeuralNet
+from nltk_utils import bag_of_words, tokenize
+from prompt_builder import COLLEGE_PROMPT, RAG_PROMPT, PromptBuilder
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# One sub-directory per tenant: data.pth, intents.json, and optionally
+# tenant.json (prompts) and rag_index/ (built by front-end/api/ingest.py)
+TENANTS_DIR = os.getenv('TENANTS_DIR', os.path.join(BASE_DIR, 'tenants'))
+# The tenant served when a request names none; loaded from this directory
+DEFAULT_TENANT = os.getenv('DEFAULT_TENANT', 'pcte')
+# Estimated memory the loaded tenants may use before the least recently used is evicted
+TENANT_MEMORY_BUDGET_MB = float(os.getenv('TENANT_MEMORY_BUDGET_MB', 512))
+TENANT_WARM_WORKERS = int(os.getenv('TENANT_WARM_WORKERS', 4))
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+_TENANT_ID = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+_shared_lock = threading.Lock()
+_embedding_model = None
+
+
+def shared_embedding_model():
+    """
+    The sentence embedding model, loaded once and shared by every tenant.
+    Returns None if sentence-transformers isn't installed.
+    """
+    global _embedding_model
+    with _shared_lock:
+        if _embedding_model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                return None
+            _embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+        return _embedding_model
+
+
+class Tenant:
+    """
+    Everything needed to answer one tenant's messages: classifier, vocabulary,
+    intents, prompt builder and (optional) RAG index.
+    """
+
+    def __init__(self, tenant_id, directory, device):
+        self.id = tenant_id
+        self.directory = directory
+        self.device = device
+
+        try:
+            data = torch.load(os.path.join(directory, 'data.pth'), weights_only=True)
+        except TypeError:
+            data = torch.load(os.path.join(directory, 'data.pth'))
+        self.all_words = data['all_words']
+        self.vocabulary = set(self.all_words)
+        self.tags = data['tags']
+        self.model = NeuralNet(data['input_size'], data['hidden_size'], data['output_size']).to(device)
+        self.model.load_state_dict(data['model_state'])
+        self.model.eval()
+
+        with open(os.path.join(directory, 'intents.json'), 'r') as f:
+            intents_text = f.read()
+        self.intents = json.loads(intents_text)
+        self.responses = {intent['tag']: intent['responses'] for intent in self.intents['intents']}
+
+        config = {}
+        config_path = os.path.join(directory, 'tenant.json')
+        if os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+        prompt = config.get('prompt', COLLEGE_PROMPT)
+
+        # RAG index: chunk texts in memory, embeddings memory-mapped
+        self.chunks = []
+        self.embeddings = None
+        index_dir = os.path.join(directory, 'rag_index')
+        if os.path.exists(os.path.join(index_dir, 'index.json')):
+            with open(os.path.join(index_dir, 'index.json'), 'r', encoding='utf-8') as f:
+                self.chunks = [entry['text'] for entry in json.load(f)['chunks']]
+            self.embeddings = np.load(os.path.join(index_dir, 'embeddings.npy'), mmap_mode='r')
+            self.embedding_norms = np.linalg.norm(self.embeddings, axis=1) + 1e-8
+            self.prompt_builder = PromptBuilder(config.get('rag_prompt', RAG_PROMPT), no_context_template=prompt)
+        else:
+            self.prompt_builder = PromptBuilder(prompt)
+
+        param_bytes = sum(p.numel() * p.element_size() for p in self.model.parameters())
+        embedding_bytes = self.embeddings.nbytes if self.embeddings is not None else 0
+        text_bytes = len(intents_text) + sum(len(chunk) for chunk in self.chunks)
+        self.size_bytes = param_bytes + embedding_bytes + text_bytes
+
+    def classify(self, user_message):
+        """
+        Returns (tag, confidence), or (None, 0.0) on error
+        """
+        try:
+            X = bag_of_words(tokenize(user_message), self.all_words)
+            X = torch.from_numpy(X.reshape(1, X.shape[0])).to(self.device)
+            with torch.no_grad():
+                probs = torch.softmax(self.model(X), dim=1)[0]
+                top_prob, top_idx = torch.max(probs, dim=0)
+            return self.tags[top_idx.item()], top_prob.item()
+        except Exception:
+            return None, 0.0
+
+    def retrieve(self, user_message, top_k=5):
+        """
+        (chunk, score) candidates from this tenant's RAG index, if it has one
+        """
+        if self.embeddings is None or not self.chunks:
+            return []
+        embedder = shared_embedding_model()
+        if embedder is None:
+            return []
+        query = np.asarray(embedder.encode([user_message])[0], dtype=np.float32)
+        scores = (self.embeddings @ query) / (self.embedding_norms * (np.linalg.norm(query) + 1e-8))
+        top = np.argsort(scores)[-top_k:][::-1]
+        return [(self.chunks[i], float(scores[i])) for i in top]
+
+
+class TenantMetrics:
+    """
+    Per-tenant counters; kept by the registry so they survive eviction.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'loads': 0, 'evictions': 0}
+        self.routes = {}
+        self.total_ms = 0.0
+        self.last_load_ms = None
+
+    def record_load(self, elapsed_ms):
+        with self.lock:
+            self.counters['loads'] += 1
+            self.last_load_ms = round(elapsed_ms, 1)
+
+    def record_eviction(self):
+        with self.lock:
+            self.counters['evictions'] += 1
+
+    def record_request(self, route, elapsed_ms):
+        with self.lock:
+            self.counters['requests'] += 1
+            self.routes[route] = self.routes.get(route, 0) + 1
+            self.total_ms += elapsed_ms
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['routes'] = dict(self.routes)
+            stats['avg_ms'] = round(self.total_ms / self.counters['requests'], 1) if self.counters['requests'] else 0.0
+            stats['last_load_ms'] = self.last_load_ms
+            return stats
+
+
+class TenantRegistry:
+    """
+    Loads tenants on demand and keeps the most recently used ones in memory
+    within `memory_budget_mb` (estimated). Pinned tenants are never evicted.
+    Concurrent requests for a tenant that is still loading wait for that load
+    instead of starting their own.
+    """
+
+    def __init__(self, tenants_dir=TENANTS_DIR, default_tenant=DEFAULT_TENANT, default_dir=BASE_DIR,
+                 memory_budget_mb=TENANT_MEMORY_BUDGET_MB, device=None):
+        self.tenants_dir = tenants_dir
+        self.default_tenant = default_tenant
+        self.default_dir = default_dir
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.device = device or torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        self.lock = threading.Lock()
+        self.loaded = OrderedDict()
+        self.loading = {}
+        self.pinned = {default_tenant}
+        self.metrics = {}
+        self.hits = 0
+        self.misses = 0
+
+    def tenant_dir(self, tenant_id):
+        if tenant_id == self.default_tenant:
+            return self.default_dir
+        if not _TENANT_ID.match(tenant_id or ''):
+            raise KeyError(tenant_id)
+        directory = os.path.join(self.tenants_dir, tenant_id)
+        if not os.path.exists(os.path.join(directory, 'data.pth')):
+            raise KeyError(tenant_id)
+        return directory
+
+    def known_tenants(self):
+        tenants = [self.default_tenant]
+        if os.path.isdir(self.tenants_dir):
+            tenants += sorted(name for name in os.listdir(self.tenants_dir)
+                              if name != self.default_tenant and _TENANT_ID.match(name)
+                              and os.path.exists(os.path.join(self.tenants_dir, name, 'data.pth')))
+        return tenants
+
+    def _metrics(self, tenant_id):
+        # Caller holds self.lock
+        if tenant_id not in self.metrics:
+            self.metrics[tenant_id] = TenantMetrics()
+        return self.metrics[tenant_id]
+
+    def get(self, tenant_id=None):
+        """
+        Return the loaded Tenant, loading it if needed.
+        Raises KeyError for unknown tenants.
+        """
+        tenant_id = tenant_id or self.default_tenant
+        with self.lock:
+            tenant = self.loaded.get(tenant_id)
+            if tenant is not None:
+                self.loaded.move_to_end(tenant_id)
+                self.hits += 1
+                return tenant
+            future = self.loading.get(tenant_id)
+            owner = future is None
+            if owner:
+                self.misses += 1
+                future = self.loading[tenant_id] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            t0 = time.perf_counter()
+            tenant = Tenant(tenant_id, self.tenant_dir(tenant_id), self.device)
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+        except BaseException as e:
+            with self.lock:
+                del self.loading[tenant_id]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self._metrics(tenant_id).record_load(elapsed_ms)
+            self.loaded[tenant_id] = tenant
+            del self.loading[tenant_id]
+            self._evict()
+        future.set_result(tenant)
+        return tenant
+
+    def _evict(self):
+        # Caller holds self.lock. Drop least recently used tenants until the
+        # estimate fits; requests already holding a Tenant keep working.
+        used = sum(t.size_bytes for t in self.loaded.values())
+        for tenant_id in list(self.loaded):
+            if used <= self.memory_budget or len(self.loaded) <= 1:
+                break
+            if tenant_id in self.pinned or tenant_id == next(reversed(self.loaded)):
+                continue
+            used -= self.loaded.pop(tenant_id).size_bytes
+            self._metrics(tenant_id).record_eviction()
+
+    def warm(self, tenant_ids, max_workers=TENANT_WARM_WORKERS):
+        """
+        Load several tenants concurrently. Returns {tenant_id: error or None}.
+        """
+        def load(tenant_id):
+            try:
+                self.get(tenant_id)
+                return None
+            except Exception as e:
+                return str(e) or type(e).__name__
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tenant-warm') as pool:
+            return dict(zip(tenant_ids, pool.map(load, tenant_ids)))
+
+    def record_request(self, tenant_id, route, elapsed_ms):
+        with self.lock:
+            metrics = self._metrics(tenant_id)
+        metrics.record_request(route, elapsed_ms)
+
+    def stats(self):
+        with self.lock:
+            loaded = {tenant_id: round(t.size_bytes / (1024 * 1024), 2) for tenant_id, t in self.loaded.items()}
+            metrics = dict(self.metrics)
+            hits, misses = self.hits, self.misses
+        return {
+            'loaded_mb': loaded,
+            'used_mb': round(sum(loaded.values()), 2),
+            'budget_mb': round(self.memory_budget / (1024 * 1024), 2),
+            'hits': hits,
+            'misses': misses,
+            'tenants': {tenant_id: m.stats() for tenant_id, m in metrics.items()},
+        }
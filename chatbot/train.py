@@ -1,5 +1,5 @@
 import json
-from nltk_utils import tokenize, stem, bag_of_words
+from nltk_utils import encode_intents
 import numpy as np
 from model import NeuralNet
 
@@ -9,37 +9,7 @@ from torch.utils.data import Dataset, DataLoader
 with open("intents.json", "r")as f:
     intents = json.load(f)
 
-all_words = []
-tags = []
-xy = []
-for intent in intents['intents']:
-    tag = intent['tag']
-    tags.append(tag)
-    for pattern in intent['patterns']:
-        w = tokenize(pattern)
-        all_words.extend(w)
-        xy.append((w,tag)) 
-
-
-ignore_words = ["?", "!", ",", "."]
-all_words = [stem(w)for w in all_words if w not in ignore_words]    
-all_words = sorted(set(all_words))
-tags = sorted(set(tags))
-
-
-
-x_train = []
-y_train = []
-for (pattern_sentence, tag) in xy:
-    bag = bag_of_words(pattern_sentence, all_words)
-    x_train.append(bag)
-
-
-    label = tags.index(tag)
-    y_train.append(label)
-
-x_train = np.array(x_train)
-y_train = np.array(y_train)  
+x_train, y_train, all_words, tags = encode_intents(intents)
 
 class chatDataset(Dataset):
     def __init__(self):
@@ -1,26 +1,49 @@
 import json
 import os
-import google.generativeai as genai
+import re
 import random
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler
 import sys
 
 # Add the current directory to the path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Shared helpers live next to the Flask backend
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'chatbot'))
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging; records are handed to a background listener so that
+# writing them never blocks a request
+_log_queue = queue.Queue(-1)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(_log_queue)])
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
+from request_log import RequestLog, StageTimer
+from prompt_builder import COLLEGE_PROMPT, RAG_PROMPT, PromptBuilder
+from speculative import SPECULATIVE_LLM, SPECULATIVE_PIPELINE, SpeculativePipeline, low_coverage
+from llm_backends import create_backend
+
+# Structured request events; /tmp is the only writable path on Vercel
+request_log = RequestLog.from_env(default_path='/tmp/requests.jsonl')
+
 try:
     from pdf_processor import get_pdf_processor
 except ImportError:
     from .pdf_processor import get_pdf_processor
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+# Pooled Gemini client, reused across invocations of a warm function
+llm_backend = create_backend()
+
+# Retrieval candidates per query; the prompt builder keeps what fits the budget
+RAG_CANDIDATES = int(os.getenv('RAG_CANDIDATES', 5))
+prompt_builder = PromptBuilder(RAG_PROMPT, no_context_template=COLLEGE_PROMPT)
+
+# Pipeline mode: retrieval (and optionally Gemini) starts alongside the local check
+speculative_pipeline = SpeculativePipeline() if SPECULATIVE_PIPELINE or SPECULATIVE_LLM else None
 
 # Simple intents for serverless (reduced set)
 COLLEGE_INTENTS = {
@@ -50,6 +73,14 @@ COLLEGE_INTENTS = {
     }
 }
 
+# Words the local keyword router knows; speculation only starts for messages
+# mostly outside them, which the local check will rarely answer
+LOCAL_VOCABULARY = {word for data in COLLEGE_INTENTS.values() for keyword in data["keywords"]
+                    for word in keyword.split()}
+
+def router_unsure(message):
+    return low_coverage(re.findall(r"[a-z']+", message.lower()), LOCAL_VOCABULARY)
+
 def get_local_response(message):
     message_lower = message.lower()
     
@@ -59,34 +90,108 @@ def get_local_response(message):
     
     return None, None, 0.0
 
-def get_gemini_response(message, use_pdf_context=True):
+def log_request(message, timer, **fields):
+    if request_log is not None:
+        request_log.record(message, backend='serverless', timings=timer.total(), **fields)
+
+def retrieve_chunks(message, timer=None):
+    """Fetch candidate (chunk, score, metadata) triples for the prompt builder."""
+    timer = timer or StageTimer()
     try:
-        context = ""
-        if use_pdf_context:
-            try:
-                pdf_processor = get_pdf_processor()
-                context = pdf_processor.get_context_for_query(message)
-            except Exception as e:
-                logger.error(f"Error getting PDF context: {str(e)}")
-                context = "[PDF context not available]"
-        
-        prompt = f"""You are a helpful college assistant chatbot for PCTE (Punjab College of Technical Education).
-        Use the context below to answer the user's question. If the context doesn't contain the answer,
-        use your general knowledge but indicate that the information might not be specific to PCTE.
-        
-        Context:
-        {context}
-        
-        User question: {message}
+        with timer.stage('retrieval'):
+            pdf_processor = get_pdf_processor()
+            return pdf_processor.find_relevant_chunks(message, top_k=RAG_CANDIDATES, with_metadata=True)
+    except Exception as e:
+        logger.error(f"Error getting PDF context: {str(e)}")
+        return []
+
+def get_gemini_response(message, use_pdf_context=True, timer=None, metrics=None, chunks=None):
+    timer = timer or StageTimer()
+    try:
+        if chunks is None:
+            chunks = retrieve_chunks(message, timer) if use_pdf_context else []
         
-        Response:"""
+        prompt, prompt_stats = prompt_builder.build(message, [(text, score) for text, score, _ in chunks])
+        if metrics is not None:
+            metrics.update(prompt_stats)
+            # Which documents the candidates came from (merged multi-document index only)
+            sources = sorted({f"{m['doc']}:{m['page']}" for _, _, m in chunks if m})
+            if sources:
+                metrics['sources'] = sources
         
-        response = gemini_model.generate_content(prompt)
-        return response.text.strip(), "gemini"
+        with timer.stage('llm'):
+            text = llm_backend.generate(prompt)
+        return text.strip(), "gemini"
     except Exception as e:
         logger.error(f"Error in get_gemini_response: {str(e)}")
         return "I'm sorry, I'm having trouble processing your request right now. Please try again later.", "gemini"
 
+def speculative_gemini_response(message, use_pdf_context):
+    """Full retrieval + Gemini call started before the local answer is known."""
+    timer, metrics = StageTimer(), {}
+    final_response, response_source = get_gemini_response(message, use_pdf_context, timer, metrics)
+    return final_response, response_source, timer.timings, metrics
+
+def speculative_retrieval(message):
+    timer = StageTimer()
+    return retrieve_chunks(message, timer), timer.timings
+
+def answer_message(user_message):
+    """
+    Local intents first, then Gemini (with PDF context for PCTE queries).
+    Returns (final_response, response_source, confidence).
+    """
+    # Check if query is about PCTE (use PDF context)
+    is_about_pcte = any(term in user_message.lower() for term in 
+                      ['pcte', 'punjab college', 'admission', 'course', 'faculty', 'campus', 'fee', 'scholarship'])
+    
+    timer = StageTimer()
+    metrics = {}
+
+    # In pipeline mode, start the slow path while the local check runs,
+    # for messages the local router is unlikely to answer
+    speculation = None
+    if speculative_pipeline is not None and router_unsure(user_message):
+        if SPECULATIVE_LLM:
+            speculation = speculative_pipeline.start(speculative_gemini_response, user_message, is_about_pcte)
+        elif is_about_pcte:
+            speculation = speculative_pipeline.start(speculative_retrieval, user_message)
+
+    # Try local intents first for simple queries
+    with timer.stage('classify'):
+        local_response, source, confidence = get_local_response(user_message)
+    
+    if local_response and confidence >= 0.8:
+        final_response = local_response
+        response_source = source
+        if speculation is not None:
+            speculation.discard()
+            metrics['speculative'] = 'discarded'
+    else:
+        # Use Gemini with PDF context for PCTE-related queries
+        chunks = None
+        if speculation is not None and SPECULATIVE_LLM:
+            final_response, response_source, timings, llm_metrics = speculation.result()
+            timer.timings.update(timings)
+            metrics.update(llm_metrics, speculative='used')
+        else:
+            if speculation is not None:
+                chunks, timings = speculation.result()
+                timer.timings.update(timings)
+                metrics['speculative'] = 'used'
+            final_response, response_source = get_gemini_response(
+                user_message, 
+                use_pdf_context=is_about_pcte,
+                timer=timer,
+                metrics=metrics,
+                chunks=chunks
+            )
+        confidence = 0.7  # Medium confidence for AI-generated responses
+
+    log_request(user_message, timer, confidence=confidence, route=response_source,
+                pdf_context=is_about_pcte, cache_hit=False, **metrics)
+    return final_response, response_source, confidence
+
 class handler(BaseHTTPRequestHandler):
     def _set_headers(self, status_code=200):
         self.send_response(status_code)
@@ -114,23 +219,7 @@ class handler(BaseHTTPRequestHandler):
                 self._send_error(400, 'Message cannot be empty')
                 return
             
-            # Check if query is about PCTE (use PDF context)
-            is_about_pcte = any(term in user_message.lower() for term in 
-                              ['pcte', 'punjab college', 'admission', 'course', 'faculty', 'campus', 'fee', 'scholarship'])
-            
-            # Try local intents first for simple queries
-            local_response, source, confidence = get_local_response(user_message)
-            
-            if local_response and confidence >= 0.8:
-                final_response = local_response
-                response_source = source
-            else:
-                # Use Gemini with PDF context for PCTE-related queries
-                final_response, response_source = get_gemini_response(
-                    user_message, 
-                    use_pdf_context=is_about_pcte
-                )
-                confidence = 0.7  # Medium confidence for AI-generated responses
+            final_response, response_source, confidence = answer_message(user_message)
             
             response_data = {
                 'message': final_response,
@@ -192,23 +281,7 @@ def handler(event, context):
                 })
             }
         
-        # Check if query is about PCTE (use PDF context)
-        is_about_pcte = any(term in user_message.lower() for term in 
-                          ['pcte', 'punjab college', 'admission', 'course', 'faculty', 'campus', 'fee', 'scholarship'])
-        
-        # Try local intents first for simple queries
-        local_response, source, confidence = get_local_response(user_message)
-        
-        if local_response and confidence >= 0.8:
-            final_response = local_response
-            response_source = source
-        else:
-            # Use Gemini with PDF context for PCTE-related queries
-            final_response, response_source = get_gemini_response(
-                message, 
-                use_pdf_context=is_about_pcte
-            )
-            confidence = 0.7  # Medium confidence for AI-generated responses
+        final_response, response_source, confidence = answer_message(user_message)
         
         return {
             'statusCode': 200,
@@ -216,7 +289,7 @@ def handler(event, context):
                 'message': final_response,
                 'status': 'success',
                 'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'user_input': message,
+                'user_input': user_message,
                 'response_source': response_source,
                 'local_confidence': confidence if response_source == "local_intents" else None,
                 'hybrid_mode': True
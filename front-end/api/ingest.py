@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Build the merged RAG index from a directory of college documents.
+
+Scans a directory for PDFs and text files (prospectus, fee circulars,
+timetables, notices, ...), extracts and chunks them in a process pool,
+embeds the chunks in batches and writes one merged index that
+PDFProcessor.load_index() serves from. Only files whose content hash
+changed since the last run (or that were indexed with a different chunk
+size or embedding model) are re-extracted and re-embedded.
+
+    python ingest.py documents/
+    python ingest.py documents/ --workers 8 --index-dir rag_index
+    python ingest.py documents/ --benchmark          # pages/sec for 1 vs N workers
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from pdf_processor import EMBEDDING_MODEL, RAG_INDEX_DIR, chunk_text
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt', '.md')
+
+
+def file_sha256(path: str) -> str:
+    """Hash file content in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_documents(source_dir: str) -> List[str]:
+    """Return supported document paths under source_dir, relative and sorted."""
+    found = []
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), source_dir))
+    return sorted(found)
+
+
+def extract_document(args: Tuple[str, str, int]) -> Dict:
+    """Extract and chunk one document (runs in a worker process).
+
+    Chunks never cross page boundaries so each carries its page number.
+    """
+    source_dir, rel_path, chunk_size = args
+    path = os.path.join(source_dir, rel_path)
+
+    if rel_path.lower().endswith('.pdf'):
+        import PyPDF2
+        with open(path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            pages = [page.extract_text() or '' for page in reader.pages]
+    else:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages = [f.read()]
+
+    chunks = []
+    for page_number, text in enumerate(pages, 1):
+        for chunk in chunk_text(text, chunk_size):
+            if chunk.strip():
+                chunks.append({'text': chunk, 'page': page_number})
+
+    return {'path': rel_path, 'pages': len(pages), 'chunks': chunks}
+
+
+def extract_all(source_dir: str, rel_paths: List[str], workers: int, chunk_size: int) -> List[Dict]:
+    """Extract documents, in a process pool when workers > 1."""
+    jobs = [(source_dir, rel_path, chunk_size) for rel_path in rel_paths]
+    if workers <= 1 or len(jobs) <= 1:
+        return [extract_document(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(extract_document, jobs, chunksize=1))
+
+
+def load_manifest(index_dir: str) -> Dict:
+    path = os.path.join(index_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {'documents': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def cache_key(sha: str, chunk_size: int, model: str = EMBEDDING_MODEL) -> str:
+    """Cache key for a document's chunks and embeddings.
+
+    Covers everything that shapes the cached entry, so a different
+    --chunk-size or EMBEDDING_MODEL re-processes instead of reusing it.
+    """
+    return hashlib.sha256(f'{sha}:{chunk_size}:{model}'.encode()).hexdigest()
+
+
+def _cache_path(index_dir: str, key: str) -> str:
+    return os.path.join(index_dir, 'cache', f'{key}.npz')
+
+
+def ingest(source_dir: str, index_dir: str = RAG_INDEX_DIR, workers: int = os.cpu_count() or 1,
+           chunk_size: int = 500, batch_size: int = 64) -> Dict:
+    """Incrementally (re)build the merged index. Returns run statistics."""
+    os.makedirs(os.path.join(index_dir, 'cache'), exist_ok=True)
+    manifest = load_manifest(index_dir)
+    previous = manifest['documents']
+
+    rel_paths = scan_documents(source_dir)
+    hashes = {rel_path: file_sha256(os.path.join(source_dir, rel_path)) for rel_path in rel_paths}
+    keys = {rel_path: cache_key(sha, chunk_size) for rel_path, sha in hashes.items()}
+    changed = [p for p in rel_paths
+               if p not in previous or previous[p].get('cache_key') != keys[p]
+               or not os.path.exists(_cache_path(index_dir, keys[p]))]
+
+    t0 = time.perf_counter()
+    extracted = extract_all(source_dir, changed, workers, chunk_size)
+    extract_seconds = time.perf_counter() - t0
+    pages = sum(doc['pages'] for doc in extracted)
+
+    t0 = time.perf_counter()
+    if extracted:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(EMBEDDING_MODEL)
+        for doc in extracted:
+            texts = [chunk['text'] for chunk in doc['chunks']]
+            embeddings = model.encode(texts, batch_size=batch_size) if texts else np.zeros((0, 0))
+            np.savez(_cache_path(index_dir, keys[doc['path']]),
+                     embeddings=np.asarray(embeddings, dtype=np.float32),
+                     chunks=np.array(json.dumps(doc['chunks'])))
+            previous[doc['path']] = {'sha256': hashes[doc['path']], 'cache_key': keys[doc['path']],
+                                     'chunk_size': chunk_size, 'model': EMBEDDING_MODEL,
+                                     'pages': doc['pages'], 'chunks': len(doc['chunks'])}
+    embed_seconds = time.perf_counter() - t0
+
+    # Merge every current document (cached or fresh) into one index
+    documents = {p: previous[p] for p in rel_paths}
+    all_chunks, all_embeddings = [], []
+    for rel_path in rel_paths:
+        with np.load(_cache_path(index_dir, keys[rel_path])) as cached:
+            chunks = json.loads(str(cached['chunks']))
+            embeddings = cached['embeddings']
+            for i, chunk in enumerate(chunks):
+                all_chunks.append({'text': chunk['text'], 'doc': rel_path, 'page': chunk['page'], 'chunk': i})
+            if len(chunks):
+                all_embeddings.append(embeddings)
+
+    merged = np.vstack(all_embeddings) if all_embeddings else np.zeros((0, 0), dtype=np.float32)
+    np.save(os.path.join(index_dir, 'embeddings.npy'), merged)
+    with open(os.path.join(index_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'model': EMBEDDING_MODEL, 'chunks': all_chunks}, f)
+    with open(os.path.join(index_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'documents': documents}, f, indent=2)
+
+    # Drop cache entries for documents (or settings) that were removed or changed
+    live = {f"{keys[p]}.npz" for p in rel_paths}
+    for name in os.listdir(os.path.join(index_dir, 'cache')):
+        if name not in live:
+            os.remove(os.path.join(index_dir, 'cache', name))
+
+    return {
+        'documents': len(rel_paths),
+        'reprocessed': len(changed),
+        'pages': pages,
+        'chunks': len(all_chunks),
+        'extract_seconds': extract_seconds,
+        'embed_seconds': embed_seconds,
+    }
+
+
+def benchmark(source_dir: str, workers: int, chunk_size: int) -> None:
+    """Report extraction throughput for 1 worker versus `workers`."""
+    rel_paths = scan_documents(source_dir)
+    print(f"{len(rel_paths)} documents in {source_dir}")
+    for n in sorted({1, workers}):
+        t0 = time.perf_counter()
+        docs = extract_all(source_dir, rel_paths, n, chunk_size)
+        elapsed = time.perf_counter() - t0
+        pages = sum(doc['pages'] for doc in docs)
+        print(f"{n:>3} worker(s): {pages} pages in {elapsed:.2f}s = {pages / max(elapsed, 1e-9):.1f} pages/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source_dir', help='directory of documents to index')
+    parser.add_argument('--index-dir', default=RAG_INDEX_DIR)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=64, help='embedding batch size')
+    parser.add_argument('--benchmark', action='store_true', help='only measure extraction pages/sec')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.source_dir, args.workers, args.chunk_size)
+        return
+
+    stats = ingest(args.source_dir, args.index_dir, args.workers, args.chunk_size, args.batch_size)
+    extract_rate = stats['pages'] / max(stats['extract_seconds'], 1e-9)
+    print(f"Indexed {stats['documents']} documents ({stats['chunks']} chunks); "
+          f"re-processed {stats['reprocessed']}")
+    if stats['reprocessed']:
+        print(f"Extraction: {stats['pages']} pages in {stats['extract_seconds']:.2f}s "
+              f"({extract_rate:.1f} pages/sec, {args.workers} workers); "
+              f"embedding: {stats['embed_seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
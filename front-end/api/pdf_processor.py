@@ -1,16 +1,38 @@
+from contextlib import nullcontext
+
+try:
+    # Imported first so MEMORY_PROFILE=1 can attribute the imports below
+    from memory_profile import memory_profiler
+    profile_step = memory_profiler.step
+except ImportError:
+    # ingest.py uses this module without the chatbot/ helpers on the path
+    def profile_step(name, kind='load'):
+        return nullcontext()
+
 import PyPDF2
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 import os
-from typing import List, Tuple
+import json
+from typing import Dict, List, Tuple
+
+# Merged multi-document index written by ingest.py
+RAG_INDEX_DIR = os.getenv('RAG_INDEX_DIR', os.path.join(os.path.dirname(__file__), 'rag_index'))
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+def chunk_text(text: str, chunk_size: int = 500) -> List[str]:
+    """Split text into fixed-size character chunks."""
+    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
 
 class PDFProcessor:
     def __init__(self, pdf_path: str):
         """Initialize the PDF processor with the path to the PCTE brochure PDF."""
         self.pdf_path = pdf_path
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        with profile_step('SentenceTransformer'):
+            self.model = SentenceTransformer(EMBEDDING_MODEL)
         self.text_chunks = []
+        self.chunk_metadata = []
         self.embeddings = None
         
     def load_and_chunk_pdf(self, chunk_size: int = 500) -> None:
@@ -25,7 +47,15 @@ class PDFProcessor:
                 text += page.extract_text() + "\n"
         
         # Simple text chunking
-        self.text_chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
+        self.text_chunks = chunk_text(text, chunk_size)
+        
+    def load_index(self, index_dir: str) -> None:
+        """Load a merged multi-document index built by ingest.py."""
+        with open(os.path.join(index_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.text_chunks = [entry['text'] for entry in index['chunks']]
+        self.chunk_metadata = [{k: v for k, v in entry.items() if k != 'text'} for entry in index['chunks']]
+        self.embeddings = np.load(os.path.join(index_dir, 'embeddings.npy'), mmap_mode='r')
         
     def generate_embeddings(self) -> None:
         """Generate embeddings for all text chunks."""
@@ -33,8 +63,13 @@ class PDFProcessor:
             self.load_and_chunk_pdf()
         self.embeddings = self.model.encode(self.text_chunks)
     
-    def find_relevant_chunks(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
-        """Find the most relevant text chunks for a given query."""
+    def find_relevant_chunks(self, query: str, top_k: int = 3, with_metadata: bool = False) -> List[Tuple]:
+        """Find the most relevant text chunks for a given query.
+
+        Returns (text, score) pairs, or (text, score, metadata) with
+        with_metadata, where metadata has the chunk's doc, page and chunk
+        id from the merged index ({} for the single-brochure path).
+        """
         if self.embeddings is None:
             self.generate_embeddings()
             
@@ -42,15 +77,22 @@ class PDFProcessor:
         similarities = cosine_similarity(query_embedding, self.embeddings)[0]
         top_indices = np.argsort(similarities)[-top_k:][::-1]
         
+        if with_metadata:
+            return [(self.text_chunks[i], float(similarities[i]), self.metadata_for(i)) for i in top_indices]
         return [(self.text_chunks[i], float(similarities[i])) for i in top_indices]
+
+    def metadata_for(self, index: int) -> Dict:
+        """Source document details for a chunk, when the index has them."""
+        return self.chunk_metadata[index] if index < len(self.chunk_metadata) else {}
     
     def get_context_for_query(self, query: str, top_k: int = 3) -> str:
         """Get formatted context for a query."""
-        relevant_chunks = self.find_relevant_chunks(query, top_k)
+        relevant_chunks = self.find_relevant_chunks(query, top_k, with_metadata=True)
         context_parts = []
         
-        for i, (chunk, score) in enumerate(relevant_chunks, 1):
-            context_parts.append(f"--- Relevant Information {i} (Relevance: {score:.2f}) ---\n{chunk}")
+        for i, (chunk, score, metadata) in enumerate(relevant_chunks, 1):
+            source = f", {metadata['doc']} p.{metadata['page']}" if metadata else ''
+            context_parts.append(f"--- Relevant Information {i} (Relevance: {score:.2f}{source}) ---\n{chunk}")
             
         return "\n\n".join(context_parts)
 
@@ -58,14 +100,22 @@ class PDFProcessor:
 pdf_processor = None
 
 def get_pdf_processor():
-    """Get or create the PDF processor instance."""
+    """Get or create the PDF processor instance.
+
+    Uses the prebuilt multi-document index when one exists, otherwise
+    chunks and embeds the brochure in-process.
+    """
     global pdf_processor
     if pdf_processor is None:
         pdf_path = os.path.join(os.path.dirname(__file__), 'pcte_brochure.pdf')
         pdf_processor = PDFProcessor(pdf_path)
         try:
-            pdf_processor.load_and_chunk_pdf()
-            pdf_processor.generate_embeddings()
+            with profile_step('embedding matrix'):
+                if os.path.exists(os.path.join(RAG_INDEX_DIR, 'index.json')):
+                    pdf_processor.load_index(RAG_INDEX_DIR)
+                else:
+                    pdf_processor.load_and_chunk_pdf()
+                    pdf_processor.generate_embeddings()
             print("PDF processor initialized successfully")
         except Exception as e:
             print(f"Error initializing PDF processor: {str(e)}")
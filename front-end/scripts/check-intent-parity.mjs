@@ -0,0 +1,64 @@
+// Checks that the in-browser intent classifier (src/lib/intentClassifier.ts)
+// matches the Python model on every training pattern.
+//
+// Generate the fixtures first with `python export_model.py` in chatbot/ (they are
+// git-ignored; deploys regenerate the model in vercel-build.mjs), then:
+//   npm run check:intents
+import { readFileSync, mkdtempSync, writeFileSync } from 'node:fs';
+import { tmpdir } from 'node:os';
+import { join, dirname } from 'node:path';
+import { fileURLToPath, pathToFileURL } from 'node:url';
+import ts from 'typescript';
+
+const root = join(dirname(fileURLToPath(import.meta.url)), '..');
+const CONFIDENCE_TOLERANCE = 1e-4;
+
+// Transpile the two TS modules into a temp dir so node can import them
+const outDir = mkdtempSync(join(tmpdir(), 'intent-parity-'));
+for (const name of ['porterStemmer', 'intentClassifier']) {
+  const source = readFileSync(join(root, 'src', 'lib', `${name}.ts`), 'utf8');
+  const { outputText } = ts.transpileModule(source, {
+    compilerOptions: { module: ts.ModuleKind.ESNext, target: ts.ScriptTarget.ES2020 },
+  });
+  writeFileSync(join(outDir, `${name}.mjs`), outputText.replace(/from '\.\/(\w+)'/g, "from './$1.mjs'"));
+}
+const { IntentClassifier, tokenize } = await import(pathToFileURL(join(outDir, 'intentClassifier.mjs')).href);
+
+const artifact = JSON.parse(readFileSync(join(root, 'public', 'intent-model.json'), 'utf8'));
+const parity = JSON.parse(readFileSync(join(root, 'scripts', 'intent-parity.json'), 'utf8'));
+const classifier = new IntentClassifier(artifact);
+
+let failures = 0;
+let tokenMismatches = 0;
+let local = 0;
+for (const { text, tokens, tag, confidence } of parity.patterns) {
+  const browserTokens = tokenize(text);
+  if (browserTokens.join(' ') !== tokens.join(' ')) {
+    tokenMismatches++;
+    console.warn(`tokenize differs for ${JSON.stringify(text)}: ${JSON.stringify(browserTokens)} vs ${JSON.stringify(tokens)}`);
+  }
+
+  // Tag/confidence parity is checked on the Python tokens so that a tokenizer
+  // difference is reported once above rather than as a model mismatch
+  const predicted = classifier.predictTokens(tokens);
+  const fromText = classifier.predict(text);
+  const routedLocally = (conf) => conf >= parity.threshold;
+  const problems = [];
+  if (predicted.tag !== tag) problems.push(`tag ${predicted.tag} != ${tag}`);
+  if (Math.abs(predicted.confidence - confidence) > CONFIDENCE_TOLERANCE) {
+    problems.push(`confidence ${predicted.confidence.toFixed(6)} != ${confidence.toFixed(6)}`);
+  }
+  if (fromText.tag !== tag || routedLocally(fromText.confidence) !== routedLocally(confidence)) {
+    problems.push(`routing differs from raw text (${fromText.tag} @ ${fromText.confidence.toFixed(4)})`);
+  }
+  if (problems.length) {
+    failures++;
+    console.error(`FAIL ${JSON.stringify(text)}: ${problems.join('; ')}`);
+  }
+  if (routedLocally(confidence) && !artifact.dynamic_tags.includes(tag)) local++;
+}
+
+const total = parity.patterns.length;
+console.log(`${total - failures}/${total} patterns match (threshold ${parity.threshold.toFixed(3)}, ` +
+  `${local} answerable in the browser, ${tokenMismatches} tokenizer differences)`);
+process.exit(failures ? 1 : 0);
@@ -1,5 +1,6 @@
 import { useState, useCallback, useEffect } from 'react';
 import axios from 'axios';
+import { loadIntentClassifier } from '../lib/intentClassifier';
 
 interface Message {
   id: string;
@@ -10,6 +11,7 @@ interface Message {
 
 interface Chat {
   id: string;
+  sessionId?: string; // chat_id issued by the backend for conversation context
   title: string;
   lastMessage: string;
   timestamp: string;
@@ -149,9 +151,25 @@ export const useChatbot = () => {
     setIsTyping(true);
 
     try {
-      const response = await axios.post(API_URL, { message: text });
-      const botResponseText = response.data.message;
-      const serverTimestamp = response.data.timestamp;
+      // Confident, static intents are answered in the browser; everything
+      // else (low confidence, time/date, Gemini topics) goes to the backend
+      const classifier = await loadIntentClassifier();
+      const localAnswer = classifier ? classifier.answer(text) : null;
+
+      let botResponseText: string | undefined;
+      let serverTimestamp: string | undefined;
+      let newSessionId: string | undefined;
+      if (localAnswer !== null) {
+        botResponseText = localAnswer;
+      } else {
+        // chat_id (issued by the backend on the first reply) keeps this
+        // conversation's context for follow-ups
+        const sessionId = chats.find(chat => chat.id === chatId)?.sessionId;
+        const response = await axios.post(API_URL, { message: text, chat_id: sessionId });
+        botResponseText = response.data.message;
+        serverTimestamp = response.data.timestamp;
+        newSessionId = response.data.chat_id;
+      }
 
       const botResponse: Message = {
         id: `msg-${Date.now()}-bot`,
@@ -166,7 +184,8 @@ export const useChatbot = () => {
               ...chat,
               messages: [...chat.messages, botResponse],
               lastMessage: botResponse.text,
-              timestamp: botResponse.timestamp
+              timestamp: botResponse.timestamp,
+              sessionId: newSessionId ?? chat.sessionId
             }
           : chat
       ));
@@ -192,7 +211,7 @@ export const useChatbot = () => {
     } finally {
       setIsTyping(false);
     }
-  }, [activeChat, createNewChat]);
+  }, [activeChat, chats, createNewChat]);
 
   const selectChat = useCallback((chatId: string) => {
     setActiveChat(chatId);
@@ -0,0 +1,180 @@
+import { porterStem } from './porterStemmer';
+
+// In-browser copy of the backend's intent classifier (tokenize -> stem ->
+// bag of words -> 3-layer MLP). The model is exported from data.pth by
+// chatbot/export_model.py into public/intent-model.json.
+
+interface EncodedTensor {
+  shape: number[];
+  data: string; // base64, little-endian float32
+}
+
+export interface IntentModelArtifact {
+  version: number;
+  input_size: number;
+  hidden_size: number;
+  output_size: number;
+  all_words: string[];
+  tags: string[];
+  threshold: number;
+  dynamic_tags: string[];
+  gemini_keywords: string[];
+  lexicon: Record<string, string>;
+  responses: Record<string, string[]>;
+  layers: EncodedTensor[]; // l1.weight, l1.bias, l2.weight, l2.bias, l3.weight, l3.bias
+}
+
+export interface IntentPrediction {
+  tag: string;
+  confidence: number;
+}
+
+interface Layer {
+  weight: Float32Array; // row-major [out, in]
+  bias: Float32Array;
+  inSize: number;
+  outSize: number;
+}
+
+const MODEL_URL = '/intent-model.json';
+
+const decodeTensor = ({ data }: EncodedTensor): Float32Array => {
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  return new Float32Array(bytes.buffer);
+};
+
+// Approximation of nltk.word_tokenize (Treebank rules) for chat-sized input
+export const tokenize = (sentence: string): string[] => {
+  const sentences = sentence.trim().split(/(?<=[.!?])\s+/);
+  const tokens: string[] = [];
+  for (let text of sentences) {
+    text = text
+      .replace(/^"/, '`` ')
+      .replace(/(``)/g, ' $1 ')
+      .replace(/([ ([{<])("|'{2})/g, '$1 `` ')
+      .replace(/([:,])([^\d])/g, ' $1 $2')
+      .replace(/([:,])$/g, ' $1 ')
+      .replace(/\.\.\./g, ' ... ')
+      .replace(/[;@#$%&]/g, ' $& ')
+      .replace(/([^.])(\.)([\])}>"']*)\s*$/g, '$1 $2$3 ')
+      .replace(/[?!]/g, ' $& ')
+      .replace(/([^'])' /g, "$1 ' ")
+      .replace(/[\][(){}<>]/g, ' $& ')
+      .replace(/--/g, ' -- ')
+      .replace(/"/g, " '' ")
+      .replace(/(\S)('')/g, '$1 $2 ');
+    text = ` ${text} `
+      .replace(/([^' ])('[sS]|'[mM]|'[dD]|') /g, '$1 $2 ')
+      .replace(/([^' ])('ll|'LL|'re|'RE|'ve|'VE|n't|N'T) /g, '$1 $2 ')
+      .replace(/\b(can)(not)\b/gi, '$1 $2')
+      .replace(/\b(gon)(na)\b/gi, '$1 $2')
+      .replace(/\b(got)(ta)\b/gi, '$1 $2')
+      .replace(/\b(wan)(na)\b/gi, '$1 $2');
+    tokens.push(...text.split(/\s+/).filter(Boolean));
+  }
+  return tokens;
+};
+
+export class IntentClassifier {
+  private readonly artifact: IntentModelArtifact;
+  private readonly wordIndex: Map<string, number>;
+  private readonly layers: Layer[];
+
+  constructor(artifact: IntentModelArtifact) {
+    this.artifact = artifact;
+    this.wordIndex = new Map(artifact.all_words.map((word, i) => [word, i]));
+    this.layers = [0, 2, 4].map((i) => {
+      const [outSize, inSize] = artifact.layers[i].shape;
+      return {
+        weight: decodeTensor(artifact.layers[i]),
+        bias: decodeTensor(artifact.layers[i + 1]),
+        inSize,
+        outSize,
+      };
+    });
+  }
+
+  get threshold(): number {
+    return this.artifact.threshold;
+  }
+
+  stem(token: string): string {
+    const lower = token.toLowerCase();
+    return this.artifact.lexicon[lower] ?? porterStem(lower);
+  }
+
+  bagOfWords(tokens: string[]): Float32Array {
+    const bag = new Float32Array(this.artifact.input_size);
+    for (const token of tokens) {
+      const index = this.wordIndex.get(this.stem(token));
+      if (index !== undefined) bag[index] = 1;
+    }
+    return bag;
+  }
+
+  predictTokens(tokens: string[]): IntentPrediction {
+    let activations = this.bagOfWords(tokens);
+    this.layers.forEach((layer, layerIndex) => {
+      const out = new Float32Array(layer.outSize);
+      for (let o = 0; o < layer.outSize; o++) {
+        let sum = layer.bias[o];
+        const row = o * layer.inSize;
+        for (let i = 0; i < layer.inSize; i++) {
+          if (activations[i] !== 0) sum += layer.weight[row + i] * activations[i];
+        }
+        // ReLU on the hidden layers only
+        out[o] = layerIndex < this.layers.length - 1 ? Math.max(0, sum) : sum;
+      }
+      activations = out;
+    });
+
+    // Softmax over the logits
+    let best = 0;
+    for (let i = 1; i < activations.length; i++) if (activations[i] > activations[best]) best = i;
+    let total = 0;
+    for (let i = 0; i < activations.length; i++) total += Math.exp(activations[i] - activations[best]);
+    return { tag: this.artifact.tags[best], confidence: 1 / total };
+  }
+
+  predict(message: string): IntentPrediction {
+    return this.predictTokens(tokenize(message));
+  }
+
+  /**
+   * Answer the message locally, or return null when it should go to the
+   * backend (Gemini-routed keywords, low confidence, or a dynamic intent).
+   */
+  answer(message: string): string | null {
+    const lower = message.toLowerCase();
+    if (this.artifact.gemini_keywords.some((keyword) => lower.includes(keyword))) return null;
+
+    const { tag, confidence } = this.predict(message);
+    if (confidence < this.artifact.threshold) return null;
+    if (this.artifact.dynamic_tags.includes(tag)) return null;
+
+    const responses = this.artifact.responses[tag];
+    if (!responses || responses.length === 0) return null;
+    return responses[Math.floor(Math.random() * responses.length)];
+  }
+}
+
+let classifierPromise: Promise<IntentClassifier | null> | null = null;
+
+// Fetch the exported model once; resolves to null if it isn't available
+export const loadIntentClassifier = (): Promise<IntentClassifier | null> => {
+  if (!classifierPromise) {
+    classifierPromise = fetch(MODEL_URL)
+      // Without an exported model, a SPA fallback answers with index.html instead of a 404
+      .then((response) =>
+        response.ok && (response.headers.get('content-type') ?? '').includes('json') ? response.json() : null,
+      )
+      .then((artifact: IntentModelArtifact | null) => (artifact ? new IntentClassifier(artifact) : null))
+      .catch((error) => {
+        console.warn('In-browser intent model unavailable, using the backend only', error);
+        return null;
+      });
+  }
+  return classifierPromise;
+};
@@ -0,0 +1,194 @@
+// Porter stemmer following NLTK's PorterStemmer (default NLTK_EXTENSIONS mode),
+// so stems computed in the browser match the ones the model was trained on.
+
+const IRREGULAR_FORMS: Record<string, string> = {
+  skies: 'sky',
+  sky: 'sky',
+  dying: 'die',
+  lying: 'lie',
+  tying: 'tie',
+  news: 'news',
+  innings: 'inning',
+  inning: 'inning',
+  outings: 'outing',
+  outing: 'outing',
+  cannings: 'canning',
+  canning: 'canning',
+  howe: 'howe',
+  proceed: 'proceed',
+  exceed: 'exceed',
+  succeed: 'succeed',
+};
+
+const isConsonant = (word: string, i: number): boolean => {
+  const ch = word[i];
+  if ('aeiou'.includes(ch)) return false;
+  if (ch === 'y') return i === 0 ? true : !isConsonant(word, i - 1);
+  return true;
+};
+
+// m in [C](VC){m}[V]
+const measure = (stem: string): number => {
+  let pattern = '';
+  for (let i = 0; i < stem.length; i++) {
+    const type = isConsonant(stem, i) ? 'c' : 'v';
+    if (pattern[pattern.length - 1] !== type) pattern += type;
+  }
+  return (pattern.match(/vc/g) || []).length;
+};
+
+const containsVowel = (stem: string): boolean => {
+  for (let i = 0; i < stem.length; i++) {
+    if (!isConsonant(stem, i)) return true;
+  }
+  return false;
+};
+
+const endsDoubleConsonant = (word: string): boolean =>
+  word.length >= 2 && word[word.length - 1] === word[word.length - 2] && isConsonant(word, word.length - 1);
+
+const endsCVC = (word: string): boolean => {
+  const n = word.length;
+  if (n >= 3) {
+    return isConsonant(word, n - 3) && !isConsonant(word, n - 2) && isConsonant(word, n - 1) && !'wxy'.includes(word[n - 1]);
+  }
+  return n === 2 && !isConsonant(word, 0) && isConsonant(word, 1);
+};
+
+type Rule = [suffix: string, replacement: string, condition: ((stem: string) => boolean) | null];
+
+// Apply the first rule whose suffix matches; later rules are not tried
+const applyRules = (word: string, rules: Rule[]): string => {
+  for (const [suffix, replacement, condition] of rules) {
+    if (word.endsWith(suffix)) {
+      const stem = word.slice(0, word.length - suffix.length);
+      if (condition === null || condition(stem)) return stem + replacement;
+      return word;
+    }
+  }
+  return word;
+};
+
+const positiveMeasure = (stem: string) => measure(stem) > 0;
+const measureGt1 = (stem: string) => measure(stem) > 1;
+
+const step1a = (word: string): string => {
+  if (word.endsWith('ies') && word.length === 4) return word.slice(0, -1);
+  return applyRules(word, [
+    ['sses', 'ss', null],
+    ['ies', 'i', null],
+    ['ss', 'ss', null],
+    ['s', '', null],
+  ]);
+};
+
+const step1b = (word: string): string => {
+  if (word.endsWith('ied')) return word.length === 4 ? word.slice(0, -1) : word.slice(0, -2);
+  if (word.endsWith('eed')) {
+    const stem = word.slice(0, -3);
+    return measure(stem) > 0 ? word.slice(0, -1) : word;
+  }
+
+  let stem: string | null = null;
+  if (word.endsWith('ed') && containsVowel(word.slice(0, -2))) stem = word.slice(0, -2);
+  else if (word.endsWith('ing') && containsVowel(word.slice(0, -3))) stem = word.slice(0, -3);
+  if (stem === null) return word;
+
+  if (stem.endsWith('at') || stem.endsWith('bl') || stem.endsWith('iz')) return stem + 'e';
+  if (endsDoubleConsonant(stem) && !'lsz'.includes(stem[stem.length - 1])) return stem.slice(0, -1);
+  if (measure(stem) === 1 && endsCVC(stem)) return stem + 'e';
+  return stem;
+};
+
+const step1c = (word: string): string => {
+  if (word.endsWith('y') && word.length > 2 && isConsonant(word, word.length - 2)) {
+    return word.slice(0, -1) + 'i';
+  }
+  return word;
+};
+
+const step2 = (word: string): string => {
+  if (word.endsWith('alli') && positiveMeasure(word.slice(0, -4))) {
+    return step2(word.slice(0, -2));
+  }
+  return applyRules(word, [
+    ['ational', 'ate', positiveMeasure],
+    ['tional', 'tion', positiveMeasure],
+    ['enci', 'ence', positiveMeasure],
+    ['anci', 'ance', positiveMeasure],
+    ['izer', 'ize', positiveMeasure],
+    ['bli', 'ble', positiveMeasure],
+    ['alli', 'al', positiveMeasure],
+    ['entli', 'ent', positiveMeasure],
+    ['eli', 'e', positiveMeasure],
+    ['ousli', 'ous', positiveMeasure],
+    ['ization', 'ize', positiveMeasure],
+    ['ation', 'ate', positiveMeasure],
+    ['ator', 'ate', positiveMeasure],
+    ['alism', 'al', positiveMeasure],
+    ['iveness', 'ive', positiveMeasure],
+    ['fulness', 'ful', positiveMeasure],
+    ['ousness', 'ous', positiveMeasure],
+    ['aliti', 'al', positiveMeasure],
+    ['iviti', 'ive', positiveMeasure],
+    ['biliti', 'ble', positiveMeasure],
+    ['fulli', 'ful', positiveMeasure],
+    ['lessli', 'less', positiveMeasure],
+    ['logi', 'log', () => positiveMeasure(word.slice(0, -3))],
+  ]);
+};
+
+const step3 = (word: string): string =>
+  applyRules(word, [
+    ['icate', 'ic', positiveMeasure],
+    ['ative', '', positiveMeasure],
+    ['alize', 'al', positiveMeasure],
+    ['iciti', 'ic', positiveMeasure],
+    ['ical', 'ic', positiveMeasure],
+    ['ful', '', positiveMeasure],
+    ['ness', '', positiveMeasure],
+  ]);
+
+const step4 = (word: string): string =>
+  applyRules(word, [
+    ['al', '', measureGt1],
+    ['ance', '', measureGt1],
+    ['ence', '', measureGt1],
+    ['er', '', measureGt1],
+    ['ic', '', measureGt1],
+    ['able', '', measureGt1],
+    ['ible', '', measureGt1],
+    ['ant', '', measureGt1],
+    ['ement', '', measureGt1],
+    ['ment', '', measureGt1],
+    ['ent', '', measureGt1],
+    ['ion', '', (stem) => measureGt1(stem) && (stem.endsWith('s') || stem.endsWith('t'))],
+    ['ou', '', measureGt1],
+    ['ism', '', measureGt1],
+    ['ate', '', measureGt1],
+    ['iti', '', measureGt1],
+    ['ous', '', measureGt1],
+    ['ive', '', measureGt1],
+    ['ize', '', measureGt1],
+  ]);
+
+const step5a = (word: string): string => {
+  if (word.endsWith('e')) {
+    const stem = word.slice(0, -1);
+    const m = measure(stem);
+    if (m > 1 || (m === 1 && !endsCVC(stem))) return stem;
+  }
+  return word;
+};
+
+const step5b = (word: string): string => {
+  if (measure(word) > 1 && endsDoubleConsonant(word) && word.endsWith('l')) return word.slice(0, -1);
+  return word;
+};
+
+export const porterStem = (input: string): string => {
+  const word = input.toLowerCase();
+  if (Object.prototype.hasOwnProperty.call(IRREGULAR_FORMS, word)) return IRREGULAR_FORMS[word];
+  if (word.length <= 2) return word;
+  return step5b(step5a(step4(step3(step2(step1c(step1b(step1a(word))))))));
+};
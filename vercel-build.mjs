@@ -44,6 +44,19 @@ async function main() {
     process.exit(1);
   }
 
+  // Generated from chatbot/data.pth so the browser classifier always matches the deployed model
+  console.log('Exporting the intent classifier for in-browser routing...');
+  if (!runCommand('pip3 install --quiet torch --index-url https://download.pytorch.org/whl/cpu', 'chatbot') ||
+      !runCommand('pip3 install --quiet nltk numpy && python3 -m nltk.downloader -q punkt punkt_tab', 'chatbot') ||
+      !runCommand('python3 export_model.py', 'chatbot')) {
+    process.exit(1);
+  }
+  // Don't ship a browser classifier that disagrees with the server's
+  if (!runCommand('npm run check:intents', frontendDir)) {
+    console.error('In-browser intent classifier does not match the Python model');
+    process.exit(1);
+  }
+
   console.log('Running build with optimized Vite configuration...');
   if (!runCommand('NODE_OPTIONS=--max_old_space_size=768 npx vite build', frontendDir, {
     NODE_OPTIONS: '--max_old_space_size=768',